@@ -6,12 +6,20 @@ using reference genome sequences as dictionaries for improved compression ratios
 """
 
 import base64
-from typing import Dict, Optional
+import threading
+from typing import Dict, List, Optional, Sequence, Union
 
 import zstandard as zstd
 
 from querulus.config import BackendConfig
 
+# Compressed sequences arrive as raw bytes when the query decodes them (bytea), or
+# as Base64 text otherwise
+Compressed = Union[bytes, str]
+
+# Below this many frames, handing a batch to zstd's worker threads costs more than it saves
+PARALLEL_DECOMPRESS_MIN_FRAMES = 32
+
 
 class CompressionService:
     """Service for compressing and decompressing genetic sequences using Zstandard."""
@@ -24,15 +32,67 @@ class CompressionService:
             config: Backend configuration containing reference genomes for all organisms
         """
         self.config = config
-        # Pre-compile dictionaries for each organism/segment combination
+        # Pre-compile dictionaries for every organism/segment and organism/gene up front,
+        # so the first request for an organism pays no dictionary construction cost.
+        # Organisms often share reference sequences, so identical references share one
+        # (read-only) dictionary.
         self._nucleotide_dicts: Dict[tuple[str, str], Optional[zstd.ZstdCompressionDict]] = {}
         self._amino_acid_dicts: Dict[tuple[str, str], Optional[zstd.ZstdCompressionDict]] = {}
+        dicts_by_reference: Dict[bytes, Optional[zstd.ZstdCompressionDict]] = {}
+
+        def build(reference_seq: bytes) -> Optional[zstd.ZstdCompressionDict]:
+            if reference_seq not in dicts_by_reference:
+                dicts_by_reference[reference_seq] = self._build_dictionary(reference_seq)
+            return dicts_by_reference[reference_seq]
+
+        for organism, organism_config in config.organisms.items():
+            reference_genome = organism_config.referenceGenome
+            for segment in reference_genome.nucleotideSequences:
+                self._nucleotide_dicts[(organism, segment.name)] = build(segment.sequence_bytes)
+            for gene in reference_genome.genes:
+                self._amino_acid_dicts[(organism, gene.name)] = build(gene.sequence_bytes)
+        # ZstdDecompressor instances must not be used concurrently, so each thread
+        # keeps its own decompressor per dictionary (see _get_decompressor)
+        self._local = threading.local()
+
+    def _get_decompressor(
+        self, key: tuple[str, str, str], dictionary: Optional[zstd.ZstdCompressionDict]
+    ) -> zstd.ZstdDecompressor:
+        """
+        Get this thread's cached decompressor for a dictionary.
+
+        Building a decompressor loads the dictionary into a fresh context, which is
+        far more expensive than the decompression of a single sequence.
+
+        Args:
+            key: Cache key of the form (kind, organism, segment/gene)
+            dictionary: Zstd dictionary the decompressor should use, if any
+
+        Returns:
+            Reusable Zstd decompressor
+        """
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+
+        dctx = decompressors.get(key)
+        if dctx is None:
+            dctx = zstd.ZstdDecompressor(dict_data=dictionary)
+            decompressors[key] = dctx
+        return dctx
+
+    @staticmethod
+    def _build_dictionary(reference_seq: bytes) -> Optional[zstd.ZstdCompressionDict]:
+        """Create a Zstd dictionary from a reference sequence (UTF-8 bytes)."""
+        if not reference_seq:
+            return None
+        return zstd.ZstdCompressionDict(reference_seq)
 
     def _get_nucleotide_dictionary(
         self, organism: str, segment_name: str
     ) -> Optional[zstd.ZstdCompressionDict]:
         """
-        Get or create Zstd dictionary for a nucleotide sequence segment.
+        Get the Zstd dictionary for a nucleotide sequence segment.
 
         Args:
             organism: Organism name (e.g., 'west-nile')
@@ -41,29 +101,15 @@ class CompressionService:
         Returns:
             Zstd dictionary or None if no reference genome defined
         """
-        key = (organism, segment_name)
-        if key not in self._nucleotide_dicts:
-            organism_config = self.config.organisms.get(organism)
-            if not organism_config:
-                raise ValueError(f"Unknown organism: {organism}")
-
-            reference_seq = organism_config.referenceGenome.get_nucleotide_sequence(
-                segment_name
-            )
-            if reference_seq:
-                # Create dictionary from reference genome sequence (UTF-8 bytes)
-                dict_data = reference_seq.encode("utf-8")
-                self._nucleotide_dicts[key] = zstd.ZstdCompressionDict(dict_data)
-            else:
-                self._nucleotide_dicts[key] = None
-
-        return self._nucleotide_dicts[key]
+        if organism not in self.config.organisms:
+            raise ValueError(f"Unknown organism: {organism}")
+        return self._nucleotide_dicts.get((organism, segment_name))
 
     def _get_amino_acid_dictionary(
         self, organism: str, gene_name: str
     ) -> Optional[zstd.ZstdCompressionDict]:
         """
-        Get or create Zstd dictionary for an amino acid sequence gene.
+        Get the Zstd dictionary for an amino acid sequence gene.
 
         Args:
             organism: Organism name (e.g., 'west-nile')
@@ -72,30 +118,18 @@ class CompressionService:
         Returns:
             Zstd dictionary or None if no reference genome defined
         """
-        key = (organism, gene_name)
-        if key not in self._amino_acid_dicts:
-            organism_config = self.config.organisms.get(organism)
-            if not organism_config:
-                raise ValueError(f"Unknown organism: {organism}")
-
-            reference_seq = organism_config.referenceGenome.get_gene_sequence(gene_name)
-            if reference_seq:
-                # Create dictionary from reference genome sequence (UTF-8 bytes)
-                dict_data = reference_seq.encode("utf-8")
-                self._amino_acid_dicts[key] = zstd.ZstdCompressionDict(dict_data)
-            else:
-                self._amino_acid_dicts[key] = None
-
-        return self._amino_acid_dicts[key]
+        if organism not in self.config.organisms:
+            raise ValueError(f"Unknown organism: {organism}")
+        return self._amino_acid_dicts.get((organism, gene_name))
 
     def decompress_nucleotide_sequence(
-        self, compressed_b64: str, organism: str, segment_name: str
+        self, compressed: Compressed, organism: str, segment_name: str
     ) -> str:
         """
         Decompress a nucleotide sequence.
 
         Args:
-            compressed_b64: Base64-encoded compressed sequence
+            compressed: Compressed sequence, raw or Base64-encoded
             organism: Organism name
             segment_name: Segment name (e.g., 'main')
 
@@ -105,19 +139,20 @@ class CompressionService:
         Raises:
             ValueError: If decompression fails
         """
-        return self._decompress(
-            compressed_b64,
+        dctx = self._get_decompressor(
+            ("nucleotide", organism, segment_name),
             self._get_nucleotide_dictionary(organism, segment_name),
         )
+        return self._decompress(compressed, dctx)
 
     def decompress_amino_acid_sequence(
-        self, compressed_b64: str, organism: str, gene_name: str
+        self, compressed: Compressed, organism: str, gene_name: str
     ) -> str:
         """
         Decompress an amino acid sequence.
 
         Args:
-            compressed_b64: Base64-encoded compressed sequence
+            compressed: Compressed sequence, raw or Base64-encoded
             organism: Organism name
             gene_name: Gene name (e.g., 'E')
 
@@ -127,46 +162,157 @@ class CompressionService:
         Raises:
             ValueError: If decompression fails
         """
-        return self._decompress(
-            compressed_b64,
+        dctx = self._get_decompressor(
+            ("amino_acid", organism, gene_name),
             self._get_amino_acid_dictionary(organism, gene_name),
         )
+        return self._decompress(compressed, dctx)
+
+    def decompress_nucleotide_sequences(
+        self,
+        compressed_list: Sequence[Compressed],
+        organism: str,
+        segment_name: str,
+        as_bytes: bool = False,
+        threads: int = 0,
+    ) -> List[Union[str, bytes, ValueError]]:
+        """
+        Decompress a batch of nucleotide sequences of the same segment.
+
+        Args:
+            compressed_list: Compressed sequences, raw or Base64-encoded
+            organism: Organism name
+            segment_name: Segment name (e.g., 'main')
+            as_bytes: Return the decompressed ASCII bytes instead of decoding to str
+            threads: Worker threads for large batches (negative for one per CPU);
+                leave at 0 when the caller already parallelizes
+
+        Returns:
+            Decompressed sequences in input order. Sequences that fail to
+            decompress are returned as ValueError instances instead of being raised.
+        """
+        dctx = self._get_decompressor(
+            ("nucleotide", organism, segment_name),
+            self._get_nucleotide_dictionary(organism, segment_name),
+        )
+        return self._decompress_batch(compressed_list, dctx, as_bytes, threads)
+
+    def decompress_amino_acid_sequences(
+        self,
+        compressed_list: Sequence[Compressed],
+        organism: str,
+        gene_name: str,
+        as_bytes: bool = False,
+        threads: int = 0,
+    ) -> List[Union[str, bytes, ValueError]]:
+        """
+        Decompress a batch of amino acid sequences of the same gene.
+
+        Args:
+            compressed_list: Compressed sequences, raw or Base64-encoded
+            organism: Organism name
+            gene_name: Gene name (e.g., 'E')
+            as_bytes: Return the decompressed ASCII bytes instead of decoding to str
+            threads: Worker threads for large batches (negative for one per CPU);
+                leave at 0 when the caller already parallelizes
+
+        Returns:
+            Decompressed sequences in input order. Sequences that fail to
+            decompress are returned as ValueError instances instead of being raised.
+        """
+        dctx = self._get_decompressor(
+            ("amino_acid", organism, gene_name),
+            self._get_amino_acid_dictionary(organism, gene_name),
+        )
+        return self._decompress_batch(compressed_list, dctx, as_bytes, threads)
+
+    def _decompress_batch(
+        self,
+        compressed_list: Sequence[Compressed],
+        dctx: zstd.ZstdDecompressor,
+        as_bytes: bool = False,
+        threads: int = 0,
+    ) -> List[Union[str, bytes, ValueError]]:
+        """
+        Decompress many sequences with a single native multi-frame call.
+
+        multi_decompress_to_buffer needs every frame to record its content size and
+        fails as a whole on a single bad frame, so on any error we fall back to
+        decompressing item by item to isolate the broken sequences. With threads, large
+        batches are split across zstd's own worker threads, which run without the GIL.
+        """
+        if not compressed_list:
+            return []
+
+        if len(compressed_list) < PARALLEL_DECOMPRESS_MIN_FRAMES:
+            threads = 0
+
+        try:
+            frames = [self._to_frame(c) for c in compressed_list]
+            buffers = dctx.multi_decompress_to_buffer(frames, threads=threads)
+            if as_bytes:
+                return [buffer.tobytes() for buffer in buffers]
+            return [buffer.tobytes().decode("ascii") for buffer in buffers]
+        except (zstd.ZstdError, ValueError, NotImplementedError):
+            pass
+
+        results: List[Union[str, bytes, ValueError]] = []
+        for compressed in compressed_list:
+            try:
+                results.append(self._decompress(compressed, dctx, as_bytes))
+            except ValueError as e:
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _to_frame(compressed: Compressed) -> bytes:
+        """Return the raw Zstd frame, Base64-decoding it first if it arrived as text."""
+        if isinstance(compressed, str):
+            return base64.b64decode(compressed)
+        return compressed
 
     def _decompress(
-        self, compressed_b64: str, dictionary: Optional[zstd.ZstdCompressionDict]
-    ) -> str:
+        self, compressed: Compressed, dctx: zstd.ZstdDecompressor, as_bytes: bool = False
+    ) -> Union[str, bytes]:
         """
-        Decompress a Base64-encoded Zstd-compressed sequence.
+        Decompress a Zstd-compressed sequence.
 
         This mirrors the logic from CompressionService.kt:
-        1. Base64 decode the compressed data
+        1. Base64 decode the compressed data (skipped if the database already decoded it)
         2. Decompress using Zstd with optional dictionary
-        3. Return UTF-8 string
+        3. Return the decoded string
+
+        Sequences only contain IUPAC/amino acid codes, so they are decoded as ASCII,
+        which is considerably cheaper than full UTF-8 validation.
 
         Args:
-            compressed_b64: Base64-encoded compressed data
-            dictionary: Optional Zstd dictionary for decompression
+            compressed: Compressed data, raw or Base64-encoded
+            dctx: Zstd decompressor, preloaded with the dictionary if there is one
+            as_bytes: Skip step 3 and return the decompressed bytes
 
         Returns:
-            Decompressed UTF-8 string
+            Decompressed sequence string (or bytes)
 
         Raises:
             ValueError: If decompression fails
         """
         try:
             # Step 1: Base64 decode
-            compressed_bytes = base64.b64decode(compressed_b64)
+            compressed_bytes = self._to_frame(compressed)
 
-            # Step 2: Decompress with Zstd
-            if dictionary:
-                dctx = zstd.ZstdDecompressor(dict_data=dictionary)
+            # Step 2: Decompress with Zstd. The output buffer is allocated once at the size
+            # recorded in the frame header; frames written without a content size cannot be
+            # decompressed in one shot, so those are streamed instead
+            if zstd.frame_content_size(compressed_bytes) == -1:
+                decompressed_bytes = dctx.decompressobj().decompress(compressed_bytes)
             else:
-                dctx = zstd.ZstdDecompressor()
+                decompressed_bytes = dctx.decompress(compressed_bytes)
 
-            decompressed_bytes = dctx.decompress(compressed_bytes)
+            if as_bytes:
+                return decompressed_bytes
 
-            # Step 3: Decode UTF-8
-            return decompressed_bytes.decode("utf-8")
+            # Step 3: Decode ASCII
+            return decompressed_bytes.decode("ascii")
 
         except Exception as e:
             raise ValueError(f"Failed to decompress sequence: {e}") from e
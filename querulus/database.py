@@ -1,8 +1,12 @@
 """Database connection and session management"""
 
+import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from functools import lru_cache
+from typing import Any, AsyncGenerator, AsyncIterator, Mapping
 
+import asyncpg
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy import text
@@ -13,18 +17,38 @@ from querulus.config import config
 # Global engine and session maker
 engine = None
 AsyncSessionLocal = None
+# Bounds the streamed responses, so slow readers cannot take over the whole pool
+stream_slots: asyncio.Semaphore | None = None
 
 
 async def init_db() -> None:
     """Initialize database connection pool"""
-    global engine, AsyncSessionLocal
+    global engine, AsyncSessionLocal, stream_slots
+
+    server_settings = {
+        # Only streams (see stream) leave a transaction open between statements
+        "idle_in_transaction_session_timeout": str(
+            int(config.settings.database_stream_idle_timeout * 1000)
+        ),
+    }
+    if config.settings.database_jit is not None:
+        server_settings["jit"] = "on" if config.settings.database_jit else "off"
 
     engine = create_async_engine(
         config.settings.database_url,
         pool_size=config.settings.database_pool_size,
         max_overflow=config.settings.database_max_overflow,
         pool_pre_ping=True,  # Verify connections before using
+        pool_recycle=config.settings.database_pool_recycle,
         echo=False,  # Set to True for SQL logging during development
+        json_deserializer=orjson.loads,  # Used by the dialect's JSON/JSONB asyncpg codecs
+        connect_args={
+            # asyncpg's own statement cache and SQLAlchemy's adapter-level cache; the
+            # endpoints reuse a small set of query templates, so keep them all prepared
+            "statement_cache_size": config.settings.database_statement_cache_size,
+            "prepared_statement_cache_size": config.settings.database_statement_cache_size,
+            "server_settings": server_settings,
+        },
     )
 
     AsyncSessionLocal = async_sessionmaker(
@@ -32,6 +56,7 @@ async def init_db() -> None:
         class_=AsyncSession,
         expire_on_commit=False,
     )
+    stream_slots = asyncio.Semaphore(config.settings.database_max_streams)
 
 
 async def close_db() -> None:
@@ -60,6 +85,56 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+@lru_cache(maxsize=256)
+def _positional_query(query_str: str) -> tuple[str, tuple[str, ...]]:
+    """Compile a query with :name parameters to asyncpg's $n form, once per SQL string"""
+    compiled = text(query_str).compile(dialect=engine.dialect)
+    return compiled.string, tuple(compiled.positiontup or ())
+
+
+@asynccontextmanager
+async def driver_connection() -> AsyncIterator[asyncpg.Connection]:
+    """Check out a pooled connection and expose the underlying asyncpg connection"""
+    if engine is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        yield raw.driver_connection
+
+
+async def fetch(query_str: str, params: Mapping[str, Any]) -> list[asyncpg.Record]:
+    """
+    Run a read query directly on asyncpg and return its Records.
+
+    Skips SQLAlchemy's result processing: Records give C-level access by column
+    name (record["name"]) and position, and JSONB is decoded by the connection's codec.
+    """
+    sql, names = _positional_query(query_str)
+    async with driver_connection() as conn:
+        return await conn.fetch(sql, *[params[name] for name in names])
+
+
+async def stream(
+    query_str: str, params: Mapping[str, Any], batch_size: int
+) -> AsyncIterator[list[asyncpg.Record]]:
+    """
+    Like fetch, but yields Records in batches from a server-side cursor.
+
+    The connection and its transaction stay open until the consumer has taken every
+    batch, i.e. for as long as a slow client takes to read the response. At most
+    database_max_streams streams run at once, and Postgres closes the session of a stream
+    whose client stops reading for longer than database_stream_idle_timeout.
+    """
+    sql, names = _positional_query(query_str)
+    async with stream_slots, driver_connection() as conn:
+        # Cursors only exist inside a transaction
+        async with conn.transaction():
+            cursor = await conn.cursor(sql, *[params[name] for name in names])
+            while rows := await cursor.fetch(batch_size):
+                yield rows
+
+
 async def health_check() -> tuple[bool, str | None]:
     """Check if database connection is healthy
 
@@ -88,9 +163,8 @@ async def health_check() -> tuple[bool, str | None]:
     )
 
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(text("SELECT 1"))
-            if result.scalar() == 1:
+        async with driver_connection() as conn:
+            if await conn.fetchval("SELECT 1") == 1:
                 return True, None
             return False, "Database query returned unexpected result"
     except Exception as e:
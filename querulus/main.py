@@ -1,23 +1,57 @@
 """Main FastAPI application (refactored to reduce duplication)"""
 
-import json
+import asyncio
+import csv
+import io
 import logging
-import uuid
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union, Callable
-from contextlib import asynccontextmanager
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union, Callable
+from contextlib import aclosing, asynccontextmanager
+from functools import lru_cache
+from types import MappingProxyType
 
+import numpy as np
 from fastapi import FastAPI, Request, Query, Body
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from sqlalchemy import text
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import QueryParams
 
+from querulus import database
 from querulus.config import config
-from querulus.database import init_db, close_db, get_db, health_check
+from querulus.database import init_db, close_db, health_check
 from querulus.query_builder import QueryBuilder
+from querulus.cache import TTLCache
 from querulus.compression import CompressionService
+from querulus.middleware import AllowAllCORSMiddleware
+from querulus.models import MetadataRequestBody, MutationsRequestBody, SequencesRequestBody
+from querulus.mutations import AMINO_ACID_UNKNOWN, NUCLEOTIDE_UNKNOWN, MutationCounter, reference_arrays
+from querulus import responses
+from querulus.responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched from the database cursor and decompressed per chunk of a streamed response
+STREAM_BATCH_SIZE = 500
+
+# Smallest chunk of rows worth handing to a separate thread when counting mutations
+MUTATION_CHUNK_MIN_ROWS = 200
+
+# Results with more rows than this are rendered in a worker thread, so serializing a
+# large response does not hold up the event loop for other requests
+RENDER_IN_THREAD_MIN_ROWS = 5000
+
+# zstd worker threads per decompressed batch of a streamed sequence response. Each
+# response already decompresses in its own worker thread, so concurrent downloads share
+# the CPUs; a small bound keeps them from each starting one zstd thread per CPU
+SEQUENCE_DECOMPRESS_THREADS = min(4, os.cpu_count() or 1)
+
+# Aggregated rows by (SQL, params). Dashboards repeat the same aggregations as users click
+# through facets; results may be up to aggregated_cache_ttl seconds stale.
+aggregated_cache = TTLCache(
+    maxsize=config.settings.aggregated_cache_size,
+    ttl=config.settings.aggregated_cache_ttl,
+)
+
 # =============================================================================
 # Lifespan
 # =============================================================================
@@ -53,17 +87,19 @@ app = FastAPI(
     description="Direct PostgreSQL-backed LAPIS API replacement",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-# Add CORS middleware to allow all origins
+# Compress responses for clients that accept gzip; FASTA and JSON shrink several-fold
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    GZipMiddleware,
+    minimum_size=config.settings.gzip_minimum_size,
+    compresslevel=config.settings.gzip_compress_level,
 )
 
+# Add CORS middleware to allow all origins
+app.add_middleware(AllowAllCORSMiddleware)
+
 # =============================================================================
 # Error handling & utilities
 # =============================================================================
@@ -81,6 +117,11 @@ async def organism_not_found_handler(_request: Request, exc: OrganismNotFound):
 
 
 def validate_organism_or_404(organism: str):
+    # Known organisms take a single dict lookup; get_organism_config builds the error
+    if config.backend_config is not None:
+        organism_config = config.backend_config.organisms.get(organism)
+        if organism_config is not None:
+            return organism_config
     try:
         return config.get_organism_config(organism)
     except ValueError as e:
@@ -91,70 +132,114 @@ def parse_fields_param(fields: Optional[str]) -> List[str]:
     return [f.strip() for f in fields.split(",")] if fields else []
 
 
+class ParsedQuery(NamedTuple):
+    # One value per key; a list for a repeated key (matched with IN), except range bounds
+    filters: Mapping[str, Union[str, List[str]]]
+    order_by: Tuple[str, ...]
+
+
+@lru_cache(maxsize=1024)
+def _parse_query_string(query_string: bytes) -> ParsedQuery:
+    params = QueryParams(query_string)
+    filters: Dict[str, Union[str, List[str]]] = {}
+    for key, value in params.multi_items():
+        previous = filters.get(key)
+        if previous is None or key.endswith(("From", "To")):
+            filters[key] = value  # A range bound takes one value; the last one wins
+        elif isinstance(previous, list):
+            previous.append(value)
+        else:
+            filters[key] = [previous, value]
+    return ParsedQuery(MappingProxyType(filters), tuple(params.getlist("orderBy")))
+
+
+def parse_query(request: Request) -> ParsedQuery:
+    """Parse the query string once per distinct string; dashboards repeat the same queries."""
+    return _parse_query_string(request.scope.get("query_string", b""))
+
+
 def parse_order_by_get(request: Request) -> List[str]:
-    qp = request.query_params
-    if hasattr(qp, "getlist"):
-        order_by = qp.getlist("orderBy")
-        if order_by:
-            return order_by
-    if "orderBy" in qp:
-        return [qp["orderBy"]]
-    return []
-
-
-def parse_order_by_post(order_by_raw: Union[str, List[Union[str, Mapping[str, Any]]], None]) -> List[Union[str, Tuple[str, str]]]:
-    if order_by_raw is None:
-        return []
-    if isinstance(order_by_raw, str):
-        return [order_by_raw]
-    out: List[Union[str, Tuple[str, str]]] = []
-    if isinstance(order_by_raw, list):
-        for item in order_by_raw:
-            if isinstance(item, str):
-                out.append(item)  # ascending by default
-            elif isinstance(item, dict) and "field" in item:
-                out.append((item["field"], item.get("type", "ascending")))
-    return out
+    return list(parse_query(request).order_by)
+
+
+# Body keys of the POST endpoints that are request options rather than metadata filters
+NON_FILTER_KEYS = frozenset({
+    "fields", "limit", "offset", "orderBy", "dataFormat", "minProportion",
+    "nucleotideMutations", "aminoAcidMutations",
+    "nucleotideInsertions", "aminoAcidInsertions",
+})
 
 
 def extract_filters(source: Mapping[str, Any], exclude: Iterable[str] = ()) -> Dict[str, Any]:
-    exclude_set = set(exclude)
+    exclude_set = exclude if isinstance(exclude, frozenset) else frozenset(exclude)
     return {k: v for k, v in source.items() if k not in exclude_set}
 
 
 async def execute_and_fetch(query_str: str, params: Mapping[str, Any]) -> List[Any]:
-    async for db in get_db():
-        result = await db.execute(text(query_str), params)
-        return result.fetchall()
-    return []
+    return await database.fetch(query_str, params)
+
+
+async def fetch_cached(cache: TTLCache, query_str: str, params: Mapping[str, Any]) -> List[Any]:
+    """execute_and_fetch through a result cache; queries with unhashable params bypass it."""
+    key: Any = (query_str, tuple(sorted(params.items())))
+    try:
+        rows = cache.get(key)
+    except TypeError:
+        return await execute_and_fetch(query_str, params)
+    if rows is None:
+        rows = await execute_and_fetch(query_str, params)
+        cache.put(key, rows)
+    return rows
+
+
+async def execute_and_stream(
+    query_str: str, params: Mapping[str, Any], batch_size: int = STREAM_BATCH_SIZE
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    Yield result rows in batches from a server-side cursor instead of fetching them all.
+
+    Callers iterate it inside aclosing(), as every generator down to database.stream
+    must be closed explicitly: then an abandoned stream gives back its stream slot,
+    connection and transaction right away rather than whenever it is garbage collected.
+    """
+    async with aclosing(database.stream(query_str, params, batch_size)) as batches:
+        async for rows in batches:
+            yield rows
+
+
+def new_request_id() -> str:
+    """Random version 4 UUID string, formatted directly rather than via uuid.UUID"""
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}"
 
 
 def make_info(organism_config, query_info: str) -> Dict[str, Any]:
     return {
         "dataVersion": "0",
-        "requestId": str(uuid.uuid4()),
-        "requestInfo": f"{organism_config.schema['organismName']} on querulus",
+        "requestId": new_request_id(),
+        "requestInfo": organism_config.request_info,
         "queryInfo": query_info,
     }
 
 
-def dict_rows_to_tsv(rows: List[Dict[str, Any]], explicit_columns: Optional[List[str]] = None) -> str:
-    if not rows:
-        return ""
-    columns = explicit_columns or list(rows[0].keys())
-    lines = ["\t".join(columns)]
-    for row in rows:
-        vals: List[str] = []
-        for col in columns:
-            value = row.get(col, "")
-            if value is None:
-                vals.append("")
-            elif isinstance(value, (dict, list)):
-                vals.append(json.dumps(value))
-            else:
-                vals.append(str(value))
-        lines.append("\t".join(vals))
-    return "\n".join(lines)
+def _tsv_rows(rows: Iterable[Iterable[Any]], columns: Optional[Sequence[str]] = None) -> str:
+    """
+    Render rows (and the header line, if columns are given) as TSV without a trailing newline.
+
+    The C csv writer renders None as an empty cell and quotes values containing tabs,
+    newlines or quotes, as LAPIS does.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter="\t", lineterminator="\n")
+    if columns is not None:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buf.getvalue()[:-1]
+
+
+def rows_to_tsv(columns: Sequence[str], rows: Iterable[Iterable[Any]]) -> str:
+    """Render rows of values (in column order) as TSV with a header line."""
+    return _tsv_rows(rows, columns)
 
 
 def maybe_attachment(response: Response, download: bool, basename: Optional[str], data_format: str, default_base: str):
@@ -170,7 +255,7 @@ def maybe_attachment(response: Response, download: bool, basename: Optional[str]
 
 
 def accession_version(row) -> str:
-    return f"{row.accession}.{row.version}"
+    return f"{row['accession']}.{row['version']}"
 
 
 # =============================================================================
@@ -178,6 +263,183 @@ def accession_version(row) -> str:
 # =============================================================================
 
 
+def decompress_rows(
+    rows: Sequence[Any],
+    decompress_batch: Callable[..., List[Union[str, bytes, ValueError]]],
+    as_bytes: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Decompress the compressed_seq column of all rows in one batch, skipping failures.
+    Sequences are str, or ASCII bytes with as_bytes.
+    """
+    rows = [row for row in rows if row["compressed_seq"]]
+    sequences = decompress_batch([row["compressed_seq"] for row in rows], as_bytes=as_bytes)
+
+    seqs: List[Dict[str, Any]] = []
+    for row, seq in zip(rows, sequences):
+        av = accession_version(row)
+        if isinstance(seq, ValueError):
+            logger.error("Error decompressing %s: %s", av, seq)
+            continue
+        seqs.append({"accessionVersion": av, "sequence": seq})
+    return seqs
+
+
+async def prime_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Run a stream up to its first chunk before handing it to a StreamingResponse.
+
+    The status line is sent as soon as a streaming response starts, so this makes query
+    errors surface as a normal error response instead of a truncated 200.
+    """
+    first = await anext(chunks, None)
+
+    async def resume() -> AsyncIterator[bytes]:
+        try:
+            if first is not None:
+                yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    return resume()
+
+
+def data_response(records: Iterable[Dict[str, Any]], info: Dict[str, Any]) -> Response:
+    """{"data": [...], "info": ...} response for a (possibly lazy) iterable of records"""
+    content = b'{"data":' + responses.dumps_array(records) + b',"info":' + responses.dumps(info) + b"}"
+    return Response(content=content, media_type="application/json")
+
+
+async def render(row_count: int, fn: Callable[..., bytes], *args: Any) -> bytes:
+    """Call a response renderer, in a worker thread if the result is large."""
+    if row_count > RENDER_IN_THREAD_MIN_ROWS:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+def conditional_response(
+    content: bytes, etag_source: bytes, media_type: str, if_none_match: Optional[str]
+) -> Response:
+    """
+    Response with a weak ETag derived from etag_source, or 304 Not Modified when the
+    client's If-None-Match already has it. This saves the transfer, not the query.
+    """
+    etag = responses.weak_etag(etag_source)
+    if responses.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=content, media_type=media_type, headers={"ETag": etag})
+
+
+async def stream_rows_json(
+    query_str: str, params: Mapping[str, Any], info: Dict[str, Any]
+) -> AsyncIterator[bytes]:
+    """
+    Yield a {"data": [...], "info": ...} document batch by batch as rows stream in.
+    Rows are (row_json,) with each row already serialized by Postgres.
+    """
+    prefix = b'{"data":['
+    async with aclosing(execute_and_stream(query_str, params)) as batches:
+        async for rows in batches:
+            if not rows:
+                continue
+            yield prefix + b",".join([row[0] for row in rows])
+            prefix = b","
+    yield (b"" if prefix == b"," else prefix) + b'],"info":' + responses.dumps(info) + b"}"
+
+
+async def stream_rows_tsv(query_str: str, params: Mapping[str, Any]) -> AsyncIterator[bytes]:
+    """Yield TSV (header from the result's columns) batch by batch as rows stream in."""
+    first = True
+    async with aclosing(execute_and_stream(query_str, params)) as batches:
+        async for rows in batches:
+            if not rows:
+                continue
+            if first:
+                yield rows_to_tsv(list(rows[0].keys()), rows).encode()
+                first = False
+            else:
+                yield ("\n" + _tsv_rows(rows)).encode()
+
+
+async def stream_fasta(
+    query_str: str,
+    params: Mapping[str, Any],
+    decompress_batch: Callable[..., List[Union[str, bytes, ValueError]]],
+) -> AsyncIterator[bytes]:
+    """Yield FASTA records batch by batch as rows stream in from the database."""
+    first = True
+    async with aclosing(execute_and_stream(query_str, params)) as batches:
+        async for rows in batches:
+            # Decompress and render in a worker thread so the event loop only moves bytes
+            chunk = await asyncio.to_thread(fasta_chunk, rows, decompress_batch, not first)
+            if not chunk:
+                continue
+            yield chunk
+            first = False
+
+
+async def stream_sequences_json(
+    query_str: str,
+    params: Mapping[str, Any],
+    decompress_batch: Callable[..., List[Union[str, bytes, ValueError]]],
+    name: str,
+) -> AsyncIterator[bytes]:
+    """Yield a JSON array of {"accessionVersion", <segment/gene name>} objects batch by batch."""
+    prefix = b"["
+    async with aclosing(execute_and_stream(query_str, params)) as batches:
+        async for rows in batches:
+            chunk = await asyncio.to_thread(sequences_json_chunk, rows, decompress_batch, name)
+            if not chunk:
+                continue
+            yield prefix + chunk
+            prefix = b","
+    yield (b"" if prefix == b"," else prefix) + b"]"
+
+
+def sequences_json_chunk(
+    rows: Sequence[Any],
+    decompress_batch: Callable[..., List[Union[str, bytes, ValueError]]],
+    name: str,
+) -> bytes:
+    """JSON objects for one batch of rows, without the enclosing brackets"""
+    seqs = decompress_rows(rows, decompress_batch)
+    if not seqs:
+        return b""
+    return responses.dumps([{"accessionVersion": s["accessionVersion"], name: s["sequence"]} for s in seqs])[1:-1]
+
+
+def fasta_chunk(
+    rows: Sequence[Any],
+    decompress_batch: Callable[..., List[Union[str, bytes, ValueError]]],
+    leading_newline: bool,
+) -> bytes:
+    # Sequences stay as decompressed bytes; no str is built just to be encoded again
+    return build_fasta(decompress_rows(rows, decompress_batch, as_bytes=True), leading_newline)
+
+
+def build_fasta(seqs: Sequence[Dict[str, Any]], leading_newline: bool = False) -> bytes:
+    """
+    Render FASTA records into a single contiguous buffer.
+
+    Sequences are ASCII bytes. Records are newline-separated without a trailing newline;
+    pass leading_newline for every chunk after the first when streaming so the joined
+    output is identical.
+    """
+    buf = bytearray()
+    extend = buf.extend
+    for i, s in enumerate(seqs):
+        if i or leading_newline:
+            extend(b"\n>")
+        else:
+            extend(b">")
+        extend(s["accessionVersion"].encode())
+        extend(b"\n")
+        extend(s["sequence"])
+    return bytes(buf)
+
+
 async def handle_nucleotide_sequences(
     *,
     organism: str,
@@ -196,35 +458,26 @@ async def handle_nucleotide_sequences(
 
     # Build query
     builder = QueryBuilder(organism, organism_config)
-    builder.add_filters_from_params(dict(filters))
+    builder.add_filters_from_params(filters)
     query_str, params = builder_query_fn(builder, segment, limit, offset)
 
-    rows = await execute_and_fetch(query_str, params)
-
-    # Decompress
     compression = request.app.state.compression
-    seqs: List[Dict[str, str]] = []
-    for row in rows:
-        av = accession_version(row)
-        compressed = row.compressed_seq
-        if not compressed:
-            continue
-        try:
-            seq = compression.decompress_nucleotide_sequence(compressed, organism, segment)
-            seqs.append({"accessionVersion": av, "sequence": seq})
-        except Exception as e:
-            logger.error(f"Error decompressing {av}: {e}")
 
-    # Format
+    def decompress_batch(batch: List[bytes], as_bytes: bool = False) -> List[Union[str, bytes, ValueError]]:
+        return compression.decompress_nucleotide_sequences(
+            batch, organism, segment, as_bytes=as_bytes, threads=SEQUENCE_DECOMPRESS_THREADS
+        )
+
     if data_format.upper() == "JSON":
-        payload = [{"accessionVersion": s["accessionVersion"], segment: s["sequence"]} for s in seqs]
-        resp = JSONResponse(content=payload)
+        resp = StreamingResponse(
+            await prime_stream(stream_sequences_json(query_str, params, decompress_batch, segment)),
+            media_type="application/json",
+        )
     else:
-        lines: List[str] = []
-        for s in seqs:
-            lines.append(f">{s['accessionVersion']}")
-            lines.append(s["sequence"])
-        resp = Response(content="\n".join(lines), media_type="text/x-fasta")
+        resp = StreamingResponse(
+            await prime_stream(stream_fasta(query_str, params, decompress_batch)),
+            media_type="text/x-fasta",
+        )
 
     # Optional download header
     maybe_attachment(resp, download_as_file, download_basename, data_format, default_download_name)
@@ -244,33 +497,26 @@ async def handle_amino_acid_sequences(
     organism_config = validate_organism_or_404(organism)
 
     builder = QueryBuilder(organism, organism_config)
-    builder.add_filters_from_params(dict(filters))
+    builder.add_filters_from_params(filters)
     query_str, params = builder.build_amino_acid_sequences_query(gene, limit, offset)
 
-    rows = await execute_and_fetch(query_str, params)
-
     compression = request.app.state.compression
-    seqs: List[Dict[str, str]] = []
-    for row in rows:
-        av = accession_version(row)
-        compressed = row.compressed_seq
-        if not compressed:
-            continue
-        try:
-            seq = compression.decompress_amino_acid_sequence(compressed, organism, gene)
-            seqs.append({"accessionVersion": av, "sequence": seq})
-        except Exception as e:
-            logger.error(f"Error decompressing {av}: {e}")
+
+    def decompress_batch(batch: List[bytes], as_bytes: bool = False) -> List[Union[str, bytes, ValueError]]:
+        return compression.decompress_amino_acid_sequences(
+            batch, organism, gene, as_bytes=as_bytes, threads=SEQUENCE_DECOMPRESS_THREADS
+        )
 
     if data_format.upper() == "JSON":
-        payload = [{"accessionVersion": s["accessionVersion"], gene: s["sequence"]} for s in seqs]
-        return JSONResponse(content=payload)
+        return StreamingResponse(
+            await prime_stream(stream_sequences_json(query_str, params, decompress_batch, gene)),
+            media_type="application/json",
+        )
     else:
-        lines: List[str] = []
-        for s in seqs:
-            lines.append(f">{s['accessionVersion']}")
-            lines.append(s["sequence"])
-        return Response(content="\n".join(lines), media_type="text/x-fasta")
+        return StreamingResponse(
+            await prime_stream(stream_fasta(query_str, params, decompress_batch)),
+            media_type="text/x-fasta",
+        )
 
 
 # =============================================================================
@@ -319,98 +565,129 @@ async def ready():
 # =============================================================================
 
 
-@app.get("/{organism}/sample/aggregated")
-async def get_aggregated(
+def aggregated_tsv(columns: Sequence[str], rows: Sequence[Any]) -> bytes:
+    return (rows_to_tsv(columns, rows) if rows else "").encode()
+
+
+def aggregated_json(columns: Sequence[str], rows: Sequence[Any], count_first: bool = False) -> bytes:
+    if count_first:
+        return responses.dumps_array({"count": row[-1], **dict(zip(columns[:-1], row))} for row in rows)
+    return responses.dumps_array(dict(zip(columns, row)) for row in rows)
+
+
+async def _aggregated(
     organism: str,
-    request: Request,
-    fields: str | None = Query(None, description="Comma-separated list of fields to group by"),
-    limit: int | None = Query(None, description="Maximum number of results"),
-    offset: int = Query(0, description="Number of results to skip"),
-    dataFormat: str = Query("JSON", description="Output format: JSON or TSV"),
-):
+    filters: Mapping[str, Any],
+    group_by_fields: List[str],
+    order_by_fields: Sequence[Any],
+    limit: Optional[int],
+    offset: int,
+    data_format: str,
+    if_none_match: Optional[str] = None,
+    count_first: bool = False,
+) -> Response:
     """
-    Get aggregated sequence counts with optional grouping by metadata fields.
+    Aggregated counts as JSON or TSV. JSON objects list the group fields, then count;
+    count_first puts count first instead, as the POST endpoint has always returned it.
     """
     organism_config = validate_organism_or_404(organism)
-    group_by_fields = parse_fields_param(fields)
-    order_by_fields = parse_order_by_get(request)
 
-    # Build query
     builder = QueryBuilder(organism, organism_config)
     builder.set_group_by_fields(group_by_fields)
     builder.set_order_by_fields(order_by_fields)
-    builder.add_filters_from_params(dict(request.query_params))
+    builder.add_filters_from_params(filters)
 
     query_str, params = builder.build_aggregated_query(limit, offset)
-    rows = await execute_and_fetch(query_str, params)
+    rows = await fetch_cached(aggregated_cache, query_str, params)
 
-    # Format results
-    if group_by_fields:
-        data: List[Dict[str, Any]] = []
-        for row in rows:
-            rd = {field: row._mapping[field] for field in group_by_fields}
-            rd["count"] = row.count
-            data.append(rd)
-    else:
-        data = [{"count": rows[0].count if rows else 0}]
+    # Grouped rows are (*group_by_fields, count), in that column order
+    columns = [*group_by_fields, "count"]
+    if not group_by_fields:
+        rows = [(rows[0]["count"] if rows else 0,)]
 
-    if dataFormat.upper() == "TSV":
-        columns = [*group_by_fields, "count"] if group_by_fields else ["count"]
-        tsv = dict_rows_to_tsv(data, explicit_columns=columns)
-        return Response(content=tsv, media_type="text/tab-separated-values")
+    if data_format.upper() == "TSV":
+        tsv = await render(len(rows), aggregated_tsv, columns, rows)
+        return conditional_response(tsv, tsv, "text/tab-separated-values", if_none_match)
 
-    return {
-        "data": data,
-        "info": make_info(organism_config, "Aggregated query"),
-    }
+    data = await render(len(rows), aggregated_json, columns, rows, count_first)
+    info = make_info(organism_config, "Aggregated query")
+    content = b'{"data":' + data + b',"info":' + responses.dumps(info) + b"}"
+    # The ETag covers the data only: info carries a fresh requestId on every response
+    return conditional_response(content, data, "application/json", if_none_match)
+
+
+@app.get("/{organism}/sample/aggregated")
+async def get_aggregated(
+    organism: str,
+    request: Request,
+    fields: str | None = Query(None, description="Comma-separated list of fields to group by"),
+    limit: int | None = Query(None, description="Maximum number of results"),
+    offset: int = Query(0, description="Number of results to skip"),
+    dataFormat: str = Query("JSON", description="Output format: JSON or TSV"),
+):
+    """
+    Get aggregated sequence counts with optional grouping by metadata fields.
+    """
+    return await _aggregated(
+        organism,
+        parse_query(request).filters,
+        parse_fields_param(fields),
+        parse_order_by_get(request),
+        limit,
+        offset,
+        dataFormat,
+        request.headers.get("if-none-match"),
+    )
 
 
 @app.post("/{organism}/sample/aggregated")
-async def post_aggregated(organism: str, body: dict = {}):
+async def post_aggregated(organism: str, body: MetadataRequestBody = MetadataRequestBody()):
     """POST version of aggregated endpoint - accepts JSON body with query parameters."""
-    organism_config = validate_organism_or_404(organism)
+    return await _aggregated(
+        organism,
+        extract_filters(body.filters, exclude=NON_FILTER_KEYS),
+        body.fields,
+        body.order_by,
+        body.limit,
+        body.offset or 0,
+        body.dataFormat,
+        count_first=True,
+    )
 
-    group_by_fields = body.get("fields", [])
-    limit = body.get("limit")
-    offset = body.get("offset", 0)
-    order_by_fields = parse_order_by_post(body.get("orderBy", []))
 
-    builder = QueryBuilder(organism, organism_config)
-    builder.set_group_by_fields(group_by_fields if isinstance(group_by_fields, list) else [])
-    builder.set_order_by_fields(order_by_fields)
-
-    filter_params = extract_filters(
-        body,
-        exclude=[
-            "fields", "limit", "offset", "orderBy",
-            "nucleotideMutations", "aminoAcidMutations",
-            "nucleotideInsertions", "aminoAcidInsertions",
-        ],
-    )
-    builder.add_filters_from_params(filter_params)
+# =============================================================================
+# Details
+# =============================================================================
 
-    query_str, params = builder.build_aggregated_query(limit, offset)
-    rows = await execute_and_fetch(query_str, params)
 
-    if group_by_fields:
-        data: List[Dict[str, Any]] = []
-        for row in rows:
-            rd = {"count": row.count}
-            for field in group_by_fields:
-                rd[field] = row._mapping[field]
-            data.append(rd)
-    else:
-        data = [{"count": rows[0].count if rows else 0}]
+async def _details(
+    organism: str,
+    filters: Mapping[str, Any],
+    selected_fields: Optional[List[str]],
+    order_by_fields: Sequence[Any],
+    limit: Optional[int],
+    offset: int,
+    data_format: str,
+) -> StreamingResponse:
+    organism_config = validate_organism_or_404(organism)
 
-    return {
-        "data": data,
-        "info": make_info(organism_config, "Aggregated query"),
-    }
+    builder = QueryBuilder(organism, organism_config)
+    builder.set_order_by_fields(order_by_fields)
+    builder.add_filters_from_params(filters)
 
+    if data_format.upper() == "TSV":
+        query_str, params = builder.build_details_query(selected_fields, limit, offset)
+        return StreamingResponse(
+            await prime_stream(stream_rows_tsv(query_str, params)),
+            media_type="text/tab-separated-values",
+        )
 
-# =============================================================================
-# Details
-# =============================================================================
+    query_str, params = builder.build_details_json_query(selected_fields, limit, offset)
+    info = make_info(organism_config, "Details query")
+    return StreamingResponse(
+        await prime_stream(stream_rows_json(query_str, params, info)),
+        media_type="application/json",
+    )
 
 
 @app.get("/{organism}/sample/details")
@@ -425,69 +702,29 @@ async def get_details(
     """
     Get detailed metadata for sequences.
     """
-    organism_config = validate_organism_or_404(organism)
-    selected_fields = parse_fields_param(fields) or None
-    order_by_fields = parse_order_by_get(request)
-
-    builder = QueryBuilder(organism, organism_config)
-    builder.set_order_by_fields(order_by_fields)
-    query_params = dict(request.query_params)
-    builder.add_filters_from_params(query_params)
-
-    query_str, params = builder.build_details_query(selected_fields, limit, offset)
-
-    # Debug parity with original
-    if "versionStatus" in query_params:
-        print("\n=== DEBUG: Details query with versionStatus filter ===")
-        print(f"Query:\n{query_str}")
-        print(f"Params: {params}")
-        print("=" * 60)
-
-    rows = await execute_and_fetch(query_str, params)
-    data = [dict(row._mapping) for row in rows]
-
-    if dataFormat.upper() == "TSV":
-        tsv = dict_rows_to_tsv(data)
-        return Response(content=tsv, media_type="text/tab-separated-values")
-
-    return {
-        "data": data,
-        "info": make_info(organism_config, "Details query"),
-    }
+    return await _details(
+        organism,
+        parse_query(request).filters,
+        parse_fields_param(fields) or None,
+        parse_order_by_get(request),
+        limit,
+        offset,
+        dataFormat,
+    )
 
 
 @app.post("/{organism}/sample/details")
-async def post_details(organism: str, body: dict = {}):
+async def post_details(organism: str, body: MetadataRequestBody = MetadataRequestBody()):
     """POST version of details endpoint - accepts JSON body with query parameters."""
-    organism_config = validate_organism_or_404(organism)
-
-    fields_list = body.get("fields", [])
-    selected_fields = fields_list if isinstance(fields_list, list) and fields_list else None
-    limit = body.get("limit")
-    offset = body.get("offset", 0)
-    order_by_fields = parse_order_by_post(body.get("orderBy", []))
-
-    builder = QueryBuilder(organism, organism_config)
-    builder.set_order_by_fields(order_by_fields)
-
-    filter_params = extract_filters(
-        body,
-        exclude=[
-            "fields", "limit", "offset", "orderBy",
-            "nucleotideMutations", "aminoAcidMutations",
-            "nucleotideInsertions", "aminoAcidInsertions",
-        ],
+    return await _details(
+        organism,
+        extract_filters(body.filters, exclude=NON_FILTER_KEYS),
+        body.fields or None,
+        body.order_by,
+        body.limit,
+        body.offset or 0,
+        body.dataFormat,
     )
-    builder.add_filters_from_params(filter_params)
-
-    query_str, params = builder.build_details_query(selected_fields, limit, offset)
-    rows = await execute_and_fetch(query_str, params)
-    data = [dict(row._mapping) for row in rows]
-
-    return {
-        "data": data,
-        "info": make_info(organism_config, "Details query"),
-    }
 
 
 # =============================================================================
@@ -506,7 +743,7 @@ async def get_aligned_nucleotide_sequences(
     """
     Get aligned nucleotide sequences in FASTA or JSON format.
     """
-    filters = dict(request.query_params)
+    filters = parse_query(request).filters
     return await handle_nucleotide_sequences(
         organism=organism,
         request=request,
@@ -515,28 +752,23 @@ async def get_aligned_nucleotide_sequences(
         limit=limit,
         offset=offset,
         filters=filters,
-        builder_query_fn=lambda b, seg, lim, off: b.build_sequences_query(seg, lim, off),
+        builder_query_fn=QueryBuilder.build_sequences_query,
         default_download_name=f"{organism}_sequences",
     )
 
 
 @app.post("/{organism}/sample/alignedNucleotideSequences")
-async def post_aligned_nucleotide_sequences(organism: str, request: Request, body: dict = {}):
+async def post_aligned_nucleotide_sequences(organism: str, request: Request, body: SequencesRequestBody = SequencesRequestBody()):
     """POST version of aligned nucleotide sequences endpoint - accepts JSON body with query parameters."""
-    limit = body.get("limit")
-    offset = body.get("offset", 0)
-    data_format = body.get("dataFormat", "FASTA")
-    filters = extract_filters(body, exclude=["limit", "offset", "dataFormat"])
-
     return await handle_nucleotide_sequences(
         organism=organism,
         request=request,
         segment="main",
-        data_format=data_format,
-        limit=limit,
-        offset=offset,
-        filters=filters,
-        builder_query_fn=lambda b, seg, lim, off: b.build_sequences_query(seg, lim, off),
+        data_format=body.dataFormat,
+        limit=body.limit,
+        offset=body.offset or 0,
+        filters=body.filters,
+        builder_query_fn=QueryBuilder.build_sequences_query,
         default_download_name=f"{organism}_sequences",
     )
 
@@ -554,7 +786,7 @@ async def get_unaligned_nucleotide_sequences(
     """
     Get unaligned nucleotide sequences in FASTA or JSON format.
     """
-    filters = dict(request.query_params)
+    filters = parse_query(request).filters
     resp = await handle_nucleotide_sequences(
         organism=organism,
         request=request,
@@ -563,7 +795,7 @@ async def get_unaligned_nucleotide_sequences(
         limit=limit,
         offset=offset,
         filters=filters,
-        builder_query_fn=lambda b, seg, lim, off: b.build_unaligned_sequences_query(seg, lim, off),
+        builder_query_fn=QueryBuilder.build_unaligned_sequences_query,
         default_download_name=f"{organism}_sequences",
         download_as_file=downloadAsFile,
         download_basename=downloadFileBasename,
@@ -572,45 +804,35 @@ async def get_unaligned_nucleotide_sequences(
 
 
 @app.post("/{organism}/sample/unalignedNucleotideSequences")
-async def post_unaligned_nucleotide_sequences(organism: str, request: Request, body: dict = {}):
+async def post_unaligned_nucleotide_sequences(organism: str, request: Request, body: SequencesRequestBody = SequencesRequestBody()):
     """POST version of unaligned nucleotide sequences endpoint - accepts JSON body with query parameters."""
-    limit = body.get("limit")
-    offset = body.get("offset", 0)
-    data_format = body.get("dataFormat", "FASTA")
-    filters = extract_filters(body, exclude=["limit", "offset", "dataFormat"])
-
     return await handle_nucleotide_sequences(
         organism=organism,
         request=request,
         segment="main",
-        data_format=data_format,
-        limit=limit,
-        offset=offset,
-        filters=filters,
-        builder_query_fn=lambda b, seg, lim, off: b.build_unaligned_sequences_query(seg, lim, off),
+        data_format=body.dataFormat,
+        limit=body.limit,
+        offset=body.offset or 0,
+        filters=body.filters,
+        builder_query_fn=QueryBuilder.build_unaligned_sequences_query,
         default_download_name=f"{organism}_sequences",
     )
 
 
 @app.post("/{organism}/sample/unalignedNucleotideSequences/{segment}")
 async def post_unaligned_nucleotide_sequences_segment(
-    organism: str, segment: str, request: Request, body: dict = {}
+    organism: str, segment: str, request: Request, body: SequencesRequestBody = SequencesRequestBody()
 ):
     """POST version of unaligned nucleotide sequences endpoint with segment parameter."""
-    limit = body.get("limit")
-    offset = body.get("offset", 0)
-    data_format = body.get("dataFormat", "FASTA")
-    filters = extract_filters(body, exclude=["limit", "offset", "dataFormat"])
-
     return await handle_nucleotide_sequences(
         organism=organism,
         request=request,
         segment=segment,
-        data_format=data_format,
-        limit=limit,
-        offset=offset,
-        filters=filters,
-        builder_query_fn=lambda b, seg, lim, off: b.build_unaligned_sequences_query(seg, lim, off),
+        data_format=body.dataFormat,
+        limit=body.limit,
+        offset=body.offset or 0,
+        filters=body.filters,
+        builder_query_fn=QueryBuilder.build_unaligned_sequences_query,
         default_download_name=f"{organism}_sequences",
     )
 
@@ -632,7 +854,7 @@ async def get_aligned_amino_acid_sequences(
     """
     Get aligned amino acid sequences in FASTA or JSON format.
     """
-    filters = dict(request.query_params)
+    filters = parse_query(request).filters
     return await handle_amino_acid_sequences(
         organism=organism,
         request=request,
@@ -649,25 +871,20 @@ async def post_aligned_amino_acid_sequences(
     organism: str,
     gene: str,
     request: Request,
-    body: dict = Body(...),
+    body: SequencesRequestBody = Body(...),
 ):
     """
     POST endpoint for aligned amino acid sequences.
     Accepts JSON body with query parameters including filters, limit, offset, and dataFormat.
     """
-    limit = body.get("limit")
-    offset = body.get("offset", 0)
-    data_format = body.get("dataFormat", "FASTA")
-    filters = dict(body)
-
     return await handle_amino_acid_sequences(
         organism=organism,
         request=request,
         gene=gene,
-        data_format=data_format,
-        limit=limit,
-        offset=offset,
-        filters=filters,
+        data_format=body.dataFormat,
+        limit=body.limit,
+        offset=body.offset or 0,
+        filters=body.filters,
     )
 
 
@@ -676,410 +893,50 @@ async def post_aligned_amino_acid_sequences(
 # =============================================================================
 
 
-@app.post("/{organism}/sample/nucleotideInsertions")
-async def post_nucleotide_insertions(organism: str, body: dict = {}):
-    """
-    Get nucleotide insertions aggregated across all matching sequences.
-
-    Returns list of insertions with counts, positions, and inserted symbols.
-    """
+async def _insertions(organism: str, body: MetadataRequestBody, column: str, query_info: str):
     organism_config = validate_organism_or_404(organism)
 
-    # Build query to get all insertions from matching sequences
     builder = QueryBuilder(organism, organism_config)
-
-    # Add filters from body (excluding special fields)
-    filter_params: Dict[str, Any] = {}
-    for k, v in body.items():
-        if k not in [
-            "fields", "limit", "offset", "orderBy",
-            "nucleotideMutations", "aminoAcidMutations",
-            "nucleotideInsertions", "aminoAcidInsertions",
-        ]:
-            if k == "isRevocation":
-                filter_params["is_revocation"] = v if isinstance(v, bool) else str(v).lower() == "true"
-            else:
-                filter_params[k] = v
-    builder.add_filters_from_params(filter_params)
-
-    # Use query builder to build a filtered CTE, then expand insertions
-    from querulus.query_builder import FIELD_DEFINITIONS, BASE_TABLE
-
-    # Separate simple and computed filters
-    simple_filters: List[Tuple[str, Any]] = []
-    computed_filters: List[Tuple[str, Any]] = []
-    for field, value in builder.filters.items():
-        base_field = field.rstrip("From").rstrip("To")
-        if base_field in FIELD_DEFINITIONS and FIELD_DEFINITIONS[base_field].requires_cte:
-            computed_filters.append((field, value))
-        else:
-            simple_filters.append((field, value))
-
-    params: Dict[str, Any] = {"organism": organism}
-
-    if computed_filters:
-        # Need CTE for computed field filtering
-        filter_base_fields = [field.rstrip("From").rstrip("To") for field, _ in computed_filters]
-
-        select_parts = []
-        for field in filter_base_fields:
-            if field in FIELD_DEFINITIONS:
-                select_parts.append(FIELD_DEFINITIONS[field].select_sql(builder))
-        select_parts.append("joint_metadata -> 'nucleotideInsertions' as insertions_all_segments")
-        select_clause = ",\n            ".join(select_parts)
-
-        # WHERE for CTE (simple filters only)
-        cte_where_clauses = []
-        for field, value in simple_filters:
-            param_name = f"filter_{field.replace('.', '_')}"
-            base_field = field.rstrip("From").rstrip("To")
-            field_def = builder._field_definition(base_field)
-            filter_expr = field_def.filter_sql(builder)
-
-            if field.endswith("From"):
-                op = ">="
-            elif field.endswith("To"):
-                op = "<="
-            else:
-                op = "="
-
-            cte_where_clauses.append(f"{filter_expr} {op} :{param_name}")
-            params[param_name] = builder._convert_param_value(value, base_field)
-
-        cte_where = f" AND {' AND '.join(cte_where_clauses)}" if cte_where_clauses else ""
-
-        # WHERE for outer query (computed filters)
-        outer_where_clauses = []
-        for field, value in computed_filters:
-            base_field = field.rstrip("From").rstrip("To")
-            param_name = f"filter_{field.replace('.', '_')}"
-            if field.endswith("From"):
-                op = ">="
-            elif field.endswith("To"):
-                op = "<="
-            else:
-                op = "="
-            outer_where_clauses.append(f'"{base_field}" {op} :{param_name}')
-            params[param_name] = value
-
-        outer_where = f"WHERE {' AND '.join(outer_where_clauses)}" if outer_where_clauses else ""
-
-        query_str = f"""
-            WITH filtered_sequences AS (
-                SELECT
-                    {select_clause}
-                FROM {BASE_TABLE}
-                WHERE organism = :organism
-                  AND released_at IS NOT NULL
-                  AND joint_metadata -> 'nucleotideInsertions' IS NOT NULL
-                  {cte_where}
-            ),
-            filtered_with_computed AS (
-                SELECT insertions_all_segments
-                FROM filtered_sequences
-                {outer_where}
-            ),
-            segments_expanded AS (
-                SELECT
-                    segment_name,
-                    insertions_array
-                FROM filtered_with_computed,
-                LATERAL jsonb_each(insertions_all_segments) AS segments(segment_name, insertions_array)
-            ),
-            insertions_data AS (
-                SELECT
-                    segment_name,
-                    jsonb_array_elements_text(insertions_array) as insertion_str
-                FROM segments_expanded
-            ),
-            parsed_insertions AS (
-                SELECT
-                    segment_name,
-                    split_part(insertion_str, ':', 1)::int as position,
-                    split_part(insertion_str, ':', 2) as inserted_symbols
-                FROM insertions_data
-            )
-            SELECT
-                'ins_' || segment_name || ':' || position || ':' || inserted_symbols as insertion,
-                COUNT(*) as count,
-                inserted_symbols,
-                position,
-                segment_name as sequence_name
-            FROM parsed_insertions
-            GROUP BY segment_name, position, inserted_symbols
-            ORDER BY count DESC, position ASC
-        """
-    else:
-        # Simple query without CTE for computed fields
-        where_clauses = []
-        for field, value in simple_filters:
-            param_name = f"filter_{field.replace('.', '_')}"
-            base_field = field.rstrip("From").rstrip("To")
-            field_def = builder._field_definition(base_field)
-            filter_expr = field_def.filter_sql(builder)
-
-            if field.endswith("From"):
-                op = ">="
-            elif field.endswith("To"):
-                op = "<="
-            else:
-                op = "="
-
-            where_clauses.append(f"{filter_expr} {op} :{param_name}")
-            params[param_name] = builder._convert_param_value(value, base_field)
-
-        where_clause = f" AND {' AND '.join(where_clauses)}" if where_clauses else ""
-
-        query_str = f"""
-            WITH segments_expanded AS (
-                SELECT
-                    segment_name,
-                    insertions_array
-                FROM sequence_entries_view,
-                LATERAL jsonb_each(joint_metadata -> 'nucleotideInsertions') AS segments(segment_name, insertions_array)
-                WHERE organism = :organism
-                  AND released_at IS NOT NULL
-                  AND joint_metadata -> 'nucleotideInsertions' IS NOT NULL
-                  {where_clause}
-            ),
-            insertions_data AS (
-                SELECT
-                    segment_name,
-                    jsonb_array_elements_text(insertions_array) as insertion_str
-                FROM segments_expanded
-            ),
-            parsed_insertions AS (
-                SELECT
-                    segment_name,
-                    split_part(insertion_str, ':', 1)::int as position,
-                    split_part(insertion_str, ':', 2) as inserted_symbols
-                FROM insertions_data
-            )
-            SELECT
-                'ins_' || segment_name || ':' || position || ':' || inserted_symbols as insertion,
-                COUNT(*) as count,
-                inserted_symbols,
-                position,
-                segment_name as sequence_name
-            FROM parsed_insertions
-            GROUP BY segment_name, position, inserted_symbols
-            ORDER BY count DESC, position ASC
-        """
+    builder.add_filters_from_params(extract_filters(body.filters, exclude=NON_FILTER_KEYS))
+    query_str, params = builder.build_insertions_query(column)
 
     rows = await execute_and_fetch(query_str, params)
+    # The ins_ label is built here, once per group, rather than concatenated in SQL
     data = [
         {
-            "insertion": row.insertion,
-            "count": row.count,
-            "insertedSymbols": row.inserted_symbols,
-            "position": row.position,
-            "sequenceName": row.sequence_name,
+            "insertion": f"ins_{sequence_name}:{position}:{inserted_symbols}",
+            "count": count,
+            "insertedSymbols": inserted_symbols,
+            "position": position,
+            "sequenceName": sequence_name,
         }
-        for row in rows
+        for count, inserted_symbols, position, sequence_name in rows
     ]
 
     return {
         "data": data,
-        "info": make_info(organism_config, "Nucleotide insertions query"),
+        "info": make_info(organism_config, query_info),
     }
 
 
-@app.post("/{organism}/sample/aminoAcidInsertions")
-async def post_amino_acid_insertions(organism: str, body: dict = {}):
+@app.post("/{organism}/sample/nucleotideInsertions")
+async def post_nucleotide_insertions(organism: str, body: MetadataRequestBody = MetadataRequestBody()):
     """
-    Get amino acid insertions aggregated across all matching sequences.
+    Get nucleotide insertions aggregated across all matching sequences.
 
-    Returns list of insertions with counts, positions, gene names, and inserted symbols.
+    Returns list of insertions with counts, positions, and inserted symbols.
     """
-    organism_config = validate_organism_or_404(organism)
+    return await _insertions(organism, body, "nucleotideInsertions", "Nucleotide insertions query")
 
-    # Build query to get all insertions from matching sequences
-    builder = QueryBuilder(organism, organism_config)
 
-    # Add filters from body (excluding special fields)
-    filter_params: Dict[str, Any] = {}
-    for k, v in body.items():
-        if k not in [
-            "fields", "limit", "offset", "orderBy",
-            "nucleotideMutations", "aminoAcidMutations",
-            "nucleotideInsertions", "aminoAcidInsertions",
-        ]:
-            if k == "isRevocation":
-                filter_params["is_revocation"] = v if isinstance(v, bool) else str(v).lower() == "true"
-            else:
-                filter_params[k] = v
-    builder.add_filters_from_params(filter_params)
-
-    # Use query builder to build a filtered CTE, then expand insertions
-    from querulus.query_builder import FIELD_DEFINITIONS, BASE_TABLE
-
-    # Separate simple and computed filters
-    simple_filters: List[Tuple[str, Any]] = []
-    computed_filters: List[Tuple[str, Any]] = []
-    for field, value in builder.filters.items():
-        base_field = field.rstrip("From").rstrip("To")
-        if base_field in FIELD_DEFINITIONS and FIELD_DEFINITIONS[base_field].requires_cte:
-            computed_filters.append((field, value))
-        else:
-            simple_filters.append((field, value))
-
-    params: Dict[str, Any] = {"organism": organism}
-
-    if computed_filters:
-        # Need CTE for computed field filtering
-        filter_base_fields = [field.rstrip("From").rstrip("To") for field, _ in computed_filters]
-
-        select_parts = []
-        for field in filter_base_fields:
-            if field in FIELD_DEFINITIONS:
-                select_parts.append(FIELD_DEFINITIONS[field].select_sql(builder))
-        select_parts.append("joint_metadata -> 'aminoAcidInsertions' as insertions_all_genes")
-        select_clause = ",\n            ".join(select_parts)
-
-        # WHERE for CTE (simple filters only)
-        cte_where_clauses = []
-        for field, value in simple_filters:
-            param_name = f"filter_{field.replace('.', '_')}"
-            base_field = field.rstrip("From").rstrip("To")
-            field_def = builder._field_definition(base_field)
-            filter_expr = field_def.filter_sql(builder)
-
-            if field.endswith("From"):
-                op = ">="
-            elif field.endswith("To"):
-                op = "<="
-            else:
-                op = "="
-
-            cte_where_clauses.append(f"{filter_expr} {op} :{param_name}")
-            params[param_name] = builder._convert_param_value(value, base_field)
-
-        cte_where = f" AND {' AND '.join(cte_where_clauses)}" if cte_where_clauses else ""
-
-        # WHERE for outer query (computed filters)
-        outer_where_clauses = []
-        for field, value in computed_filters:
-            base_field = field.rstrip("From").rstrip("To")
-            param_name = f"filter_{field.replace('.', '_')}"
-            if field.endswith("From"):
-                op = ">="
-            elif field.endswith("To"):
-                op = "<="
-            else:
-                op = "="
-            outer_where_clauses.append(f"{base_field} {op} :{param_name}")
-            params[param_name] = builder._convert_param_value(value, base_field)
-
-        outer_where = f"WHERE {' AND '.join(outer_where_clauses)}" if outer_where_clauses else ""
-
-        query_str = f"""
-            WITH filtered_sequences AS (
-                SELECT
-                    {select_clause}
-                FROM {BASE_TABLE}
-                WHERE organism = :organism
-                  AND released_at IS NOT NULL
-                  AND joint_metadata -> 'aminoAcidInsertions' IS NOT NULL
-                  {cte_where}
-            ),
-            filtered_with_computed AS (
-                SELECT insertions_all_genes
-                FROM filtered_sequences
-                {outer_where}
-            ),
-            gene_insertions AS (
-                SELECT
-                    gene_key as gene,
-                    jsonb_array_elements_text(gene_insertions) as insertion_str
-                FROM filtered_with_computed,
-                     LATERAL jsonb_each(insertions_all_genes) as genes(gene_key, gene_insertions)
-                WHERE jsonb_typeof(gene_insertions) = 'array'
-            ),
-            parsed_insertions AS (
-                SELECT
-                    gene,
-                    split_part(insertion_str, ':', 1)::int as position,
-                    split_part(insertion_str, ':', 2) as inserted_symbols
-                FROM gene_insertions
-            )
-            SELECT
-                'ins_' || gene || ':' || position || ':' || inserted_symbols as insertion,
-                COUNT(*) as count,
-                inserted_symbols,
-                position,
-                gene as sequence_name
-            FROM parsed_insertions
-            GROUP BY gene, position, inserted_symbols
-            ORDER BY count DESC, gene ASC, position ASC
-        """
-    else:
-        # No computed filters, use simpler query
-        where_clauses = []
-        for field, value in simple_filters:
-            param_name = f"filter_{field.replace('.', '_')}"
-            base_field = field.rstrip("From").rstrip("To")
-            field_def = builder._field_definition(base_field)
-            filter_expr = field_def.filter_sql(builder)
-
-            if field.endswith("From"):
-                op = ">="
-            elif field.endswith("To"):
-                op = "<="
-            else:
-                op = "="
-
-            where_clauses.append(f"{filter_expr} {op} :{param_name}")
-            params[param_name] = builder._convert_param_value(value, base_field)
-
-        where_clause = f" AND {' AND '.join(where_clauses)}" if where_clauses else ""
-
-        query_str = f"""
-            WITH gene_insertions AS (
-                SELECT
-                    gene_key as gene,
-                    jsonb_array_elements_text(gene_insertions) as insertion_str
-                FROM sequence_entries_view,
-                     LATERAL jsonb_each(joint_metadata -> 'aminoAcidInsertions') as genes(gene_key, gene_insertions)
-                WHERE organism = :organism
-                  AND released_at IS NOT NULL
-                  AND joint_metadata -> 'aminoAcidInsertions' IS NOT NULL
-                  AND jsonb_typeof(gene_insertions) = 'array'
-                  {where_clause}
-            ),
-            parsed_insertions AS (
-                SELECT
-                    gene,
-                    split_part(insertion_str, ':', 1)::int as position,
-                    split_part(insertion_str, ':', 2) as inserted_symbols
-                FROM gene_insertions
-            )
-            SELECT
-                'ins_' || gene || ':' || position || ':' || inserted_symbols as insertion,
-                COUNT(*) as count,
-                inserted_symbols,
-                position,
-                gene as sequence_name
-            FROM parsed_insertions
-            GROUP BY gene, position, inserted_symbols
-            ORDER BY count DESC, gene ASC, position ASC
-        """
-
-    rows = await execute_and_fetch(query_str, params)
-    data = [
-        {
-            "insertion": row.insertion,
-            "count": row.count,
-            "insertedSymbols": row.inserted_symbols,
-            "position": row.position,
-            "sequenceName": row.sequence_name,
-        }
-        for row in rows
-    ]
+@app.post("/{organism}/sample/aminoAcidInsertions")
+async def post_amino_acid_insertions(organism: str, body: MetadataRequestBody = MetadataRequestBody()):
+    """
+    Get amino acid insertions aggregated across all matching sequences.
 
-    return {
-        "data": data,
-        "info": make_info(organism_config, "Amino acid insertions query"),
-    }
+    Returns list of insertions with counts, positions, gene names, and inserted symbols.
+    """
+    return await _insertions(organism, body, "aminoAcidInsertions", "Amino acid insertions query")
 
 
 # =============================================================================
@@ -1087,121 +944,214 @@ async def post_amino_acid_insertions(organism: str, body: dict = {}):
 # =============================================================================
 
 
-async def _aligned_sequences_metadata(organism: str, params: Mapping[str, Any], request: Request):
-    organism_config = validate_organism_or_404(organism)
+async def _aligned_sequences_metadata(
+    organism: str, organism_config, params: Mapping[str, Any], sequences_key: str, names: Sequence[str]
+):
     builder = QueryBuilder(organism, organism_config)
-    builder.add_filters_from_params(dict(params))
-    query_str, qparams = builder.build_aligned_sequences_metadata_query(limit=None, offset=0)
-    rows = await execute_and_fetch(query_str, qparams)
-    return organism_config, rows
-
+    builder.add_filters_from_params(params)
+    query_str, qparams = builder.build_aligned_sequences_metadata_query(
+        sequences_key, names, limit=None, offset=0
+    )
+    return await execute_and_fetch(query_str, qparams)
 
-@app.get("/{organism}/sample/nucleotideMutations")
-async def get_nucleotide_mutations(organism: str, request: Request):
-    """Get nucleotide mutations for matching sequences"""
-    organism_config, rows = await _aligned_sequences_metadata(organism, request.query_params, request)
 
-    all_mutations: List[Dict[str, Any]] = []
-    compression = request.app.state.compression
+def count_mutations(
+    rows: Sequence[Any],
+    unknown: int,
+    decompress_batch: Callable[[List[Any], str], List[Union[bytes, ValueError]]],
+    references: Mapping[str, np.ndarray],
+) -> MutationCounter:
+    """
+    Count the mutations of every sequence in (accession, version, sequences) rows, where
+    sequences holds the compressed sequence (or None) of each segment/gene of references,
+    in the same order.
 
-    for row in rows:
-        aligned_sequences = row.aligned_sequences or {}
-        for segment_name, seq_data in aligned_sequences.items():
-            if not seq_data or "compressedSequence" not in seq_data:
+    Sequences are grouped by segment/gene and decompressed one batch per group, so each
+    group shares one decompressor and a single native multi-frame call.
+    """
+    counter = MutationCounter(unknown)
+    # name -> [(accession, version, compressed)]
+    compressed_by_name: Dict[str, List[Tuple[Any, Any, Any]]] = {}
+    for accession, version, sequences in rows:
+        for name, compressed in zip(references, sequences):
+            if compressed is not None:
+                compressed_by_name.setdefault(name, []).append((accession, version, compressed))
+
+    for name, items in compressed_by_name.items():
+        reference = references[name]
+        sequences = decompress_batch([compressed for _, _, compressed in items], name)
+        for (accession, version, _), sequence in zip(items, sequences):
+            if isinstance(sequence, ValueError):
+                logger.error("Error decompressing %s for %s.%s: %s", name, accession, version, sequence)
                 continue
             try:
-                sequence = compression.decompress_nucleotide_sequence(
-                    seq_data["compressedSequence"], organism, segment_name
-                )
-                reference_seq = organism_config.referenceGenome.get_nucleotide_sequence(segment_name)
-                if not reference_seq:
-                    continue
-                for i, (ref_base, seq_base) in enumerate(zip(reference_seq, sequence)):
-                    if ref_base != seq_base and seq_base != "N":
-                        position = i + 1
-                        all_mutations.append({
-                            "mutation": f"{ref_base}{position}{seq_base}",
-                            "mutationFrom": ref_base,
-                            "mutationTo": seq_base,
-                            "position": position,
-                            "sequenceName": None,
-                            "count": 1,
-                            "coverage": 1,
-                            "proportion": 1.0,
-                        })
+                counter.add(name, reference, sequence)
             except Exception as e:
-                logger.error(f"Error calculating mutations for {row.accession}.{row.version}: {e}")
+                logger.error("Error calculating mutations in %s for %s.%s: %s", name, accession, version, e)
+    return counter
 
-    return {
-        "data": all_mutations,
-        "info": make_info(organism_config, "Nucleotide mutations query"),
-    }
+
+async def count_mutations_parallel(
+    rows: Sequence[Any],
+    unknown: int,
+    decompress_batch: Callable[[List[Any], str], List[Union[bytes, ValueError]]],
+    references: Mapping[str, np.ndarray],
+) -> MutationCounter:
+    """
+    count_mutations split into one chunk of rows per CPU, run in worker threads.
+
+    Decompression and the NumPy comparisons release the GIL, so the chunks run in
+    parallel while the event loop stays free to serve other requests.
+    """
+    chunk_size = max(MUTATION_CHUNK_MIN_ROWS, -(-len(rows) // (os.cpu_count() or 1)))
+    counters = await asyncio.gather(*(
+        asyncio.to_thread(
+            count_mutations, rows[i:i + chunk_size], unknown, decompress_batch, references
+        )
+        for i in range(0, len(rows), chunk_size)
+    ))
+
+    counter = MutationCounter(unknown)
+    for chunk_counter in counters:
+        counter.merge(chunk_counter)
+    return counter
+
+
+async def _nucleotide_mutations(
+    organism: str,
+    filters: Mapping[str, Any],
+    compression: CompressionService,
+    min_proportion: Optional[float] = None,
+):
+    organism_config = validate_organism_or_404(organism)
+    references = reference_arrays(organism_config.referenceGenome.nucleotideSequences)
+    rows = await _aligned_sequences_metadata(
+        organism, organism_config, filters, "alignedNucleotideSequences", list(references)
+    )
+
+    def decompress_batch(batch: List[Any], segment_name: str) -> List[Union[bytes, ValueError]]:
+        return compression.decompress_nucleotide_sequences(
+            batch, organism, segment_name, as_bytes=True
+        )
+
+    counter = await count_mutations_parallel(
+        rows,
+        NUCLEOTIDE_UNKNOWN,
+        decompress_batch,
+        references,
+    )
+
+    # Generated lazily and serialized in chunks rather than kept as one list of dicts
+    all_mutations = (
+        {
+            "mutation": f"{ref_base}{position}{seq_base}",
+            "mutationFrom": ref_base,
+            "mutationTo": seq_base,
+            "position": position,
+            "sequenceName": None,
+            "count": count,
+            "coverage": coverage,
+            "proportion": count / coverage,
+        }
+        for _, position, ref_base, seq_base, count, coverage in counter.results()
+        if min_proportion is None or count / coverage >= min_proportion
+    )
+
+    return data_response(all_mutations, make_info(organism_config, "Nucleotide mutations query"))
+
+
+@app.get("/{organism}/sample/nucleotideMutations")
+async def get_nucleotide_mutations(
+    organism: str,
+    request: Request,
+    minProportion: float | None = Query(None, description="Minimum proportion of a mutation among covered sequences"),
+):
+    """Get nucleotide mutations for matching sequences"""
+    return await _nucleotide_mutations(
+        organism, parse_query(request).filters, request.app.state.compression, minProportion
+    )
 
 
 @app.post("/{organism}/sample/nucleotideMutations")
 async def post_nucleotide_mutations(
     organism: str,
     request: Request,
-    body: dict = Body({}),
+    body: MutationsRequestBody = MutationsRequestBody(),
 ):
     """POST version of nucleotide mutations endpoint (preserves GET behavior)."""
-    merged = dict(request.query_params)
-    merged.update(body or {})
-    return await get_nucleotide_mutations(organism, type("FakeReq", (), {"query_params": merged, "app": request.app})())
+    return await _nucleotide_mutations(
+        organism,
+        {**parse_query(request).filters, **extract_filters(body.filters, exclude=NON_FILTER_KEYS)},
+        request.app.state.compression,
+        body.minProportion,
+    )
 
 
-@app.get("/{organism}/sample/aminoAcidMutations")
-async def get_amino_acid_mutations(organism: str, request: Request):
-    """Get amino acid mutations for matching sequences"""
-    organism_config, rows = await _aligned_sequences_metadata(organism, request.query_params, request)
+async def _amino_acid_mutations(
+    organism: str,
+    filters: Mapping[str, Any],
+    compression: CompressionService,
+    min_proportion: Optional[float] = None,
+):
+    organism_config = validate_organism_or_404(organism)
+    references = reference_arrays(organism_config.referenceGenome.genes)
+    rows = await _aligned_sequences_metadata(
+        organism, organism_config, filters, "alignedAminoAcidSequences", list(references)
+    )
 
-    all_mutations: List[Dict[str, Any]] = []
-    compression = request.app.state.compression
+    def decompress_batch(batch: List[Any], gene_name: str) -> List[Union[bytes, ValueError]]:
+        return compression.decompress_amino_acid_sequences(batch, organism, gene_name, as_bytes=True)
 
-    for row in rows:
-        aa_sequences = row.amino_acid_sequences or {}
-        for gene_name, seq_data in aa_sequences.items():
-            if not seq_data or "compressedSequence" not in seq_data:
-                continue
-            try:
-                sequence = compression.decompress_amino_acid_sequence(
-                    seq_data["compressedSequence"], organism, gene_name
-                )
-                reference_seq = organism_config.referenceGenome.get_gene_sequence(gene_name)
-                if not reference_seq:
-                    continue
-
-                for i, (ref_aa, seq_aa) in enumerate(zip(reference_seq, sequence)):
-                    if ref_aa != seq_aa and seq_aa != "X":
-                        all_mutations.append({
-                            "mutation": f"{gene_name}:{ref_aa}{i+1}{seq_aa}",
-                            "mutationFrom": ref_aa,
-                            "mutationTo": seq_aa,
-                            "position": i + 1,
-                            "count": 1,
-                            "coverage": 1,
-                            "proportion": 1.0,
-                            "sequenceName": gene_name,
-                        })
-            except Exception as e:
-                logger.error(f"Error processing {gene_name} for {row.accession}.{row.version}: {e}")
+    counter = await count_mutations_parallel(
+        rows,
+        AMINO_ACID_UNKNOWN,
+        decompress_batch,
+        references,
+    )
 
-    return {
-        "data": all_mutations,
-        "info": make_info(organism_config, "Amino acid mutations query"),
-    }
+    all_mutations = (
+        {
+            "mutation": f"{gene_name}:{ref_aa}{position}{seq_aa}",
+            "mutationFrom": ref_aa,
+            "mutationTo": seq_aa,
+            "position": position,
+            "count": count,
+            "coverage": coverage,
+            "proportion": count / coverage,
+            "sequenceName": gene_name,
+        }
+        for gene_name, position, ref_aa, seq_aa, count, coverage in counter.results()
+        if min_proportion is None or count / coverage >= min_proportion
+    )
+
+    return data_response(all_mutations, make_info(organism_config, "Amino acid mutations query"))
+
+
+@app.get("/{organism}/sample/aminoAcidMutations")
+async def get_amino_acid_mutations(
+    organism: str,
+    request: Request,
+    minProportion: float | None = Query(None, description="Minimum proportion of a mutation among covered sequences"),
+):
+    """Get amino acid mutations for matching sequences"""
+    return await _amino_acid_mutations(
+        organism, parse_query(request).filters, request.app.state.compression, minProportion
+    )
 
 
 @app.post("/{organism}/sample/aminoAcidMutations")
 async def post_amino_acid_mutations(
     organism: str,
     request: Request,
-    body: dict = Body({}),
+    body: MutationsRequestBody = MutationsRequestBody(),
 ):
     """POST version of amino acid mutations endpoint (preserves GET behavior)."""
-    merged = dict(request.query_params)
-    merged.update(body or {})
-    return await get_amino_acid_mutations(organism, type("FakeReq", (), {"query_params": merged, "app": request.app})())
+    return await _amino_acid_mutations(
+        organism,
+        {**parse_query(request).filters, **extract_filters(body.filters, exclude=NON_FILTER_KEYS)},
+        request.app.state.compression,
+        body.minProportion,
+    )
 
 
 # =============================================================================
@@ -1211,4 +1161,4 @@ async def post_amino_acid_mutations(
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
@@ -0,0 +1,100 @@
+"""ASGI middleware"""
+
+from starlette.middleware.cors import ALL_METHODS
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_ALLOWED_METHODS = frozenset(method.encode() for method in ALL_METHODS)
+
+_PREFLIGHT_HEADERS = [
+    (
+        b"vary",
+        b"Origin, Access-Control-Request-Method, Access-Control-Request-Headers, "
+        b"Access-Control-Request-Private-Network",
+    ),
+    (b"access-control-allow-methods", ", ".join(ALL_METHODS).encode()),
+    (b"access-control-max-age", b"600"),
+    (b"access-control-allow-credentials", b"true"),
+]
+
+
+class AllowAllCORSMiddleware:
+    """
+    CORS for any origin, method and header, with credentials allowed.
+
+    Responds exactly like Starlette's CORSMiddleware configured with "*" everywhere and
+    allow_credentials=True (so the request origin is echoed back), but works on the raw
+    ASGI header lists with prebuilt values instead of wrapping them in Headers objects
+    on every request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = request_method = request_headers = private_network = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = origin or value
+            elif name == b"access-control-request-method":
+                request_method = request_method or value
+            elif name == b"access-control-request-headers":
+                request_headers = request_headers or value
+            elif name == b"access-control-request-private-network":
+                private_network = private_network or value
+
+        if origin is not None and request_method is not None and scope["method"] == "OPTIONS":
+            await self._preflight(send, origin, request_method, request_headers, private_network)
+            return
+
+        cors_headers = [(b"vary", b"Origin")]
+        if origin is not None:
+            cors_headers += [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+            ]
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                vary = [value for name, value in headers if name == b"vary"]
+                if vary:
+                    # Merge into a single Vary header, as Starlette does
+                    headers = [(name, value) for name, value in headers if name != b"vary"]
+                    message["headers"] = headers + [
+                        (b"vary", b", ".join([*vary, b"Origin"])), *cors_headers[1:]
+                    ]
+                else:
+                    message["headers"] = headers + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    @staticmethod
+    async def _preflight(
+        send: Send,
+        origin: bytes,
+        request_method: bytes,
+        request_headers: bytes | None,
+        private_network: bytes | None,
+    ) -> None:
+        headers = [*_PREFLIGHT_HEADERS, (b"access-control-allow-origin", origin)]
+        if request_headers is not None:
+            headers.append((b"access-control-allow-headers", request_headers))
+
+        failures = []
+        if request_method not in _ALLOWED_METHODS:
+            failures.append("method")
+        if private_network is not None:
+            failures.append("private-network")
+
+        body = f"Disallowed CORS {', '.join(failures)}".encode() if failures else b"OK"
+        headers += [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", b"text/plain; charset=utf-8"),
+        ]
+        await send({"type": "http.response.start", "status": 400 if failures else 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
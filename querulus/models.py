@@ -0,0 +1,89 @@
+"""Request body models for the POST endpoints"""
+
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+
+class RequestBody(BaseModel):
+    """
+    Common POST body options. Any other keys are metadata filters, available via
+    model_extra, so they are validated together with the options in one pass.
+    """
+
+    model_config = ConfigDict(extra="allow")
+
+    limit: int | None = None
+    offset: int | None = 0
+
+    @property
+    def filters(self) -> dict[str, Any]:
+        return self.model_extra or {}
+
+
+class OrderByField(BaseModel):
+    """An orderBy entry given as an object rather than a plain field name"""
+
+    field: str
+    type: str | None = "ascending"  # Anything but "descending" sorts ascending
+
+
+class MetadataRequestBody(RequestBody):
+    """Body of the aggregated, details and insertions endpoints"""
+
+    fields: list[str] = []
+    orderBy: str | list[str | OrderByField] | None = None
+    dataFormat: str = "JSON"
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def _wrap_single_field(cls, value: Any) -> Any:
+        """Accept a single field name as well as a list, and null for no fields"""
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return value
+
+    @field_validator("dataFormat", mode="before")
+    @classmethod
+    def _default_data_format(cls, value: Any) -> Any:
+        """Treat a null dataFormat as not given"""
+        return "JSON" if value is None else value
+
+    @field_validator("orderBy", mode="before")
+    @classmethod
+    def _drop_unusable_order_by(cls, value: Any) -> Any:
+        """Ignore entries that name no field (and non-list values) instead of rejecting them"""
+        if value is None or isinstance(value, str):
+            return value
+        if not isinstance(value, list):
+            return None
+        return [item for item in value if isinstance(item, str) or (isinstance(item, dict) and "field" in item)]
+
+    @property
+    def order_by(self) -> list[str | tuple[str, str]]:
+        """orderBy as QueryBuilder.set_order_by_fields expects it"""
+        if self.orderBy is None:
+            return []
+        if isinstance(self.orderBy, str):
+            return [self.orderBy]
+        return [item if isinstance(item, str) else (item.field, item.type) for item in self.orderBy]
+
+
+class MutationsRequestBody(MetadataRequestBody):
+    """Body of the mutations endpoints"""
+
+    minProportion: float | None = None
+
+
+class SequencesRequestBody(RequestBody):
+    """Body of the sequence endpoints"""
+
+    dataFormat: str = "FASTA"
+
+    @field_validator("dataFormat", mode="before")
+    @classmethod
+    def _default_data_format(cls, value: Any) -> Any:
+        """Treat a null dataFormat as not given"""
+        return "FASTA" if value is None else value
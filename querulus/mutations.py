@@ -0,0 +1,120 @@
+"""
+Mutation calling against reference sequences.
+
+Aligned sequences have the same coordinates as their reference, so mutations are the
+positions where the two differ. Comparisons run on uint8 arrays with NumPy instead of
+a per-character Python loop, and mutations are counted across all sequences of a query
+rather than reported once per sequence.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from querulus.config import ReferenceSequence
+
+NUCLEOTIDE_UNKNOWN = ord("N")
+AMINO_ACID_UNKNOWN = ord("X")
+
+
+@lru_cache(maxsize=256)
+def reference_array(reference_seq: str) -> np.ndarray:
+    """Reference sequence as a read-only uint8 array, built once per reference"""
+    return np.frombuffer(reference_seq.encode("ascii"), dtype=np.uint8)
+
+
+def reference_arrays(references: Iterable[ReferenceSequence]) -> Dict[str, np.ndarray]:
+    """Reference arrays by segment/gene name; the first entry wins for duplicate names"""
+    arrays: Dict[str, np.ndarray] = {}
+    for reference in references:
+        if reference.sequence and reference.name not in arrays:
+            arrays[reference.name] = reference_array(reference.sequence)
+    return arrays
+
+
+class _SegmentCounts:
+    """Mutation and coverage counts for one segment or gene"""
+
+    def __init__(self, reference: np.ndarray):
+        self.reference = reference
+        # Number of sequences with a known symbol at each position
+        self.coverage = np.zeros(len(reference), dtype=np.int64)
+        # One array per sequence of position * 256 + mutated symbol
+        self.codes: List[np.ndarray] = []
+
+
+class MutationCounter:
+    """
+    Counts mutations across many aligned sequences.
+
+    A mutation is identified by (segment/gene, position, symbol). Its coverage is the
+    number of sequences with a known (not N/X) symbol at that position.
+    """
+
+    def __init__(self, unknown: int):
+        """
+        Args:
+            unknown: Symbol code that does not count as a mutation or as coverage (N or X)
+        """
+        self.unknown = unknown
+        self._segments: Dict[str, _SegmentCounts] = {}
+
+    def add(self, name: str, reference: np.ndarray, sequence: Union[str, bytes]) -> None:
+        """
+        Count the mutations of one aligned sequence.
+
+        Args:
+            name: Segment or gene name
+            reference: Reference as returned by reference_array
+            sequence: Aligned sequence (str or ASCII bytes), same coordinates as the
+                reference. Only the part overlapping the reference is compared.
+        """
+        if isinstance(sequence, str):
+            sequence = sequence.encode("ascii")
+        seq = np.frombuffer(sequence, dtype=np.uint8)
+        segment = self._segments.get(name)
+        if segment is None:
+            segment = self._segments[name] = _SegmentCounts(reference)
+
+        length = min(len(reference), len(seq))
+        ref = reference[:length]
+        seq = seq[:length]
+
+        known = seq != self.unknown
+        indices = np.flatnonzero((ref != seq) & known)
+        segment.coverage[:length] += known
+        segment.codes.append(indices * 256 + seq[indices])
+
+    def merge(self, other: "MutationCounter") -> None:
+        """Add the counts of another counter (e.g. from a different chunk of rows)"""
+        for name, theirs in other._segments.items():
+            ours = self._segments.get(name)
+            if ours is None:
+                self._segments[name] = theirs
+                continue
+            ours.coverage += theirs.coverage
+            ours.codes.extend(theirs.codes)
+
+    def results(self) -> Iterator[Tuple[str, int, str, str, int, int]]:
+        """
+        Yield (name, 1-based position, reference symbol, symbol, count, coverage) per
+        distinct mutation, by segment/gene in first-seen order, then position and symbol.
+        """
+        for name, segment in self._segments.items():
+            if not segment.codes:
+                continue
+            codes, counts = np.unique(np.concatenate(segment.codes), return_counts=True)
+            if not len(codes):
+                continue
+            positions = codes >> 8
+            ref_symbols = segment.reference[positions].tobytes().decode("ascii")
+            symbols = (codes & 0xFF).astype(np.uint8).tobytes().decode("ascii")
+            yield from zip(
+                [name] * len(codes),
+                (positions + 1).tolist(),
+                ref_symbols,
+                symbols,
+                counts.tolist(),
+                segment.coverage[positions].tolist(),
+            )
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import date
-from typing import Any, Callable, Iterable, Sequence
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping, Sequence
 
 # ---------------------------------------------------------------------------
 # Constants & small helpers
@@ -28,12 +30,71 @@ JOIN_SQL: dict[str, str] = {
 
 _PARAM_SANITIZER = re.compile(r"[^a-zA-Z0-9_]")
 
+# Request options that add_filters_from_params never treats as filters
+_SPECIAL_PARAMS = frozenset({
+    "fields", "orderBy", "limit", "offset", "format",
+    "downloadAsFile", "downloadFileBasename", "dataFormat", "minProportion",
+})
+
+# Result order of the insertions endpoints, kept as each endpoint has always returned it
+_INSERTIONS_ORDER_BY = {
+    "nucleotideInsertions": "count DESC, position ASC",
+    "aminoAcidInsertions": "count DESC, sequence_name ASC, position ASC",
+}
+
 
 def _sql_quote_literal(s: str) -> str:
     """Escape single quotes for embedding string literals inside SQL."""
     return s.replace("'", "''")
 
 
+# Rendered SQL keyed by query shape (see QueryBuilder._query_shape). The SQL text only
+# depends on the shape, so requests that differ only in filter values reuse it and just
+# rebuild their bound parameters. Like the metadata field cache, entries are not
+# invalidated because organism configs are loaded once at startup.
+_SQL_CACHE_MAX_SIZE = 2048
+_SQL_CACHE: OrderedDict[tuple[Any, ...], str] = OrderedDict()
+
+
+def _sql_cache_get(key: tuple[Any, ...] | None) -> str | None:
+    if key is None:
+        return None
+    query = _SQL_CACHE.get(key)
+    if query is not None:
+        _SQL_CACHE.move_to_end(key)
+    return query
+
+
+def _sql_cache_put(key: tuple[Any, ...] | None, query: str) -> None:
+    if key is None:
+        return
+    _SQL_CACHE[key] = query
+    if len(_SQL_CACHE) > _SQL_CACHE_MAX_SIZE:
+        _SQL_CACHE.popitem(last=False)
+
+
+def _strip_range_suffix(field: str) -> str:
+    if field.endswith("From"):
+        return field[:-4]
+    if field.endswith("To"):
+        return field[:-2]
+    return field
+
+
+@lru_cache(maxsize=512)
+def _classify_filters(fields: tuple[str, ...]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """
+    Split filter keys into (simple, computed) by whether their base field needs the CTE.
+    Only built-in fields can be computed; metadata fields never are.
+    """
+    simple: list[str] = []
+    computed: list[str] = []
+    for field in fields:
+        definition = FIELD_DEFINITIONS.get(_strip_range_suffix(field))
+        (computed if definition is not None and definition.requires_cte else simple).append(field)
+    return tuple(simple), tuple(computed)
+
+
 ExpressionFactory = Callable[["QueryBuilder"], str]
 OrderFactory = Callable[["QueryBuilder"], Sequence[str]]
 ParamDict = dict[str, Any]
@@ -135,6 +196,9 @@ def _metadata_field_definition(field: str, builder: "QueryBuilder | None" = None
 class QueryBuilder:
     """Builds SQL queries from LAPIS-style parameters."""
 
+    # One builder is created per request; slots keep it small and attribute access fast
+    __slots__ = ("organism", "organism_config", "filters", "group_by_fields", "order_by_fields")
+
     def __init__(self, organism: str, organism_config: Any = None):
         self.organism = organism
         self.organism_config = organism_config
@@ -150,16 +214,14 @@ class QueryBuilder:
         self.filters[field] = value
         return self
 
-    def add_filters_from_params(self, params: dict[str, Any]) -> "QueryBuilder":
-        special_params = {
-            "fields", "orderBy", "limit", "offset", "format",
-            "downloadAsFile", "downloadFileBasename", "dataFormat",
-        }
+    def add_filters_from_params(self, params: Mapping[str, Any]) -> "QueryBuilder":
         for key, value in params.items():
-            if key not in special_params and value is not None:
+            if key not in _SPECIAL_PARAMS and value is not None:
                 # Handle isRevocation: convert string to bool for PostgreSQL boolean column
                 if key == "isRevocation" and isinstance(value, str):
                     value = value.lower() == "true"
+                elif key == "isRevocation" and isinstance(value, list):
+                    value = [v.lower() == "true" if isinstance(v, str) else v for v in value]
                 # Convert boolean values to lowercase strings for JSONB metadata fields
                 # (fields not in FIELD_DEFINITIONS are stored as text in JSONB)
                 elif isinstance(value, bool) and key not in FIELD_DEFINITIONS:
@@ -324,6 +386,39 @@ class QueryBuilder:
         op = operator or "="
         return f"{expression} {op} :{param_name}"
 
+    def _filter_params(self) -> ParamDict:
+        """Bound parameters for the current filters, named exactly as the builders name them."""
+        params: ParamDict = {"organism": self.organism}
+        for field, value in self.filters.items():
+            base_field, operator = self._resolve_filter_base(field)
+            param_prefix = f"filter_{_PARAM_SANITIZER.sub('_', field)}"
+            self._render_filter_condition("", value, operator, params, param_prefix, base_field)
+        return params
+
+    def _query_shape(self, kind: str, *extra: Any) -> tuple[Any, ...] | None:
+        """
+        Everything the generated SQL text depends on: filter keys (and list lengths, which
+        determine the IN placeholders), grouping, ordering and the builder arguments.
+        Returns None if any part is unhashable, in which case the query is not cached.
+        """
+        filter_shape = tuple(
+            (field, len(value) if isinstance(value, list) else None)
+            for field, value in self.filters.items()
+        )
+        key = (
+            kind,
+            self.organism,
+            filter_shape,
+            tuple(self.group_by_fields),
+            tuple(self.order_by_fields),
+            *extra,
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
     # Small utility to normalize order direction
     @staticmethod
     def _normalize_direction(direction: str | None) -> str:
@@ -332,24 +427,35 @@ class QueryBuilder:
     # Filter partitioning used by multiple builders
     def _split_filters(self) -> tuple[list[tuple[str, Any]], list[tuple[str, Any]]]:
         """Return (simple_filters, computed_filters) while preserving original order."""
-        simple: list[tuple[str, Any]] = []
-        computed: list[tuple[str, Any]] = []
-        for field, value in self.filters.items():
-            base_field, _ = self._resolve_filter_base(field)
-            if self._field_definition(base_field).requires_cte:
-                computed.append((field, value))
-            else:
-                simple.append((field, value))
-        return simple, computed
+        simple_fields, computed_fields = _classify_filters(tuple(self.filters))
+        return (
+            [(field, self.filters[field]) for field in simple_fields],
+            [(field, self.filters[field]) for field in computed_fields],
+        )
 
     # ------------------------------------------------------------------
     # Ordering
     # ------------------------------------------------------------------
     def build_order_by_clause(self, context: str = "details") -> str:
+        return self._order_clause(self._order_by_terms(context))
+
+    @staticmethod
+    def _order_clause(order_terms: list[tuple[str, str]], sort_columns: bool = False) -> str:
+        """Join order terms, optionally sorting on the "__sort_N" columns exposing them."""
+        return ", ".join(
+            (f'"__sort_{index}" {direction}' if sort_columns else f"{expr} {direction}").rstrip()
+            for index, (expr, direction) in enumerate(order_terms)
+        )
+
+    def _order_by_terms(self, context: str, use_alias: bool = True) -> list[tuple[str, str]]:
+        """The ORDER BY as (sort expression, direction suffix) pairs."""
         if not self.order_by_fields:
-            return "count DESC" if context == "aggregated" else '"accession"'
+            if context == "aggregated":
+                return [("count", "DESC")]
+            # Qualified, as data use terms joins bring in a second accession column
+            return [('"accession"' if use_alias else f"{BASE_TABLE}.accession", "")]
 
-        order_fragments: list[str] = []
+        order_terms: list[tuple[str, str]] = []
         for item in self.order_by_fields:
             # Parse field and direction
             if isinstance(item, tuple):
@@ -360,18 +466,18 @@ class QueryBuilder:
                 sql_direction = "ASC"  # Default to ascending
 
             if field == "random":
-                order_fragments.append("RANDOM()")
+                order_terms.append(("RANDOM()", ""))
                 continue
             if field == "count" and context == "aggregated":
-                order_fragments.append(f"count {sql_direction} NULLS LAST")
+                order_terms.append(("count", f"{sql_direction} NULLS LAST"))
                 continue
 
             definition = self._field_definition(field)
-            fragments = definition.order_sql(self, use_alias=True)
+            fragments = definition.order_sql(self, use_alias=use_alias)
             # Add direction and NULLS LAST to each fragment for consistent null handling
-            order_fragments.extend(f"{frag} {sql_direction} NULLS LAST" for frag in fragments)
+            order_terms.extend((frag, f"{sql_direction} NULLS LAST") for frag in fragments)
 
-        return ", ".join(order_fragments)
+        return order_terms
 
     # ------------------------------------------------------------------
     # Aggregated queries
@@ -379,6 +485,11 @@ class QueryBuilder:
     def build_aggregated_query(
         self, limit: int | None = None, offset: int = 0
     ) -> tuple[str, ParamDict]:
+        cache_key = self._query_shape("aggregated", limit, offset)
+        cached = _sql_cache_get(cache_key)
+        if cached is not None:
+            return cached, self._filter_params()
+
         params: ParamDict = {"organism": self.organism}
 
         filter_base_fields = self._filter_base_fields()
@@ -409,6 +520,7 @@ class QueryBuilder:
             else:
                 query = self._build_aggregated_count(params, filter_base_fields)
 
+        _sql_cache_put(cache_key, query)
         return query, params
 
     def _build_aggregated_query_simple(
@@ -478,9 +590,9 @@ class QueryBuilder:
         cte_where: list[str] = []
         outer_where: list[str] = []
         cte_filter_fields: list[str] = []
+        _, computed_fields = _classify_filters(tuple(self.filters))
         for field, value in self.filters.items():
-            base_field, _ = self._resolve_filter_base(field)
-            if self._field_definition(base_field).requires_cte:
+            if field in computed_fields:
                 self._append_filter_clause(
                     outer_where,
                     field=field,
@@ -489,7 +601,7 @@ class QueryBuilder:
                     use_alias=True,
                 )
             else:
-                cte_filter_fields.append(base_field)
+                cte_filter_fields.append(_strip_range_suffix(field))
                 self._append_filter_clause(
                     cte_where,
                     field=field,
@@ -566,9 +678,9 @@ class QueryBuilder:
 
         cte_where: list[str] = []
         outer_where: list[str] = []
+        _, computed_fields = _classify_filters(tuple(self.filters))
         for field, value in self.filters.items():
-            base_field, _ = self._resolve_filter_base(field)
-            if self._field_definition(base_field).requires_cte:
+            if field in computed_fields:
                 self._append_filter_clause(
                     outer_where,
                     field=field,
@@ -651,28 +763,52 @@ class QueryBuilder:
 
     def build_aligned_sequences_metadata_query(
         self,
+        sequences_key: str,
+        names: Sequence[str],
         limit: int | None = None,
         offset: int = 0,
     ) -> tuple[str, ParamDict]:
-        """Return accession, version, and aligned/AA sequences JSONB for mutation calculation."""
+        """
+        Return (accession, version, sequences) rows for mutation calculation, where
+        sequences is an array with the compressed sequence (bytea, or NULL if missing) of
+        each of names, the segments/genes under sequences_key ('alignedNucleotideSequences'
+        or 'alignedAminoAcidSequences').
+        """
+        cache_key = self._query_shape(
+            "aligned_sequences_metadata", sequences_key, tuple(names), limit, offset
+        )
+        cached = _sql_cache_get(cache_key)
+        if cached is not None:
+            return cached, self._filter_params()
+
         params: ParamDict = {"organism": self.organism}
+        # Base64-decode in Postgres so only the compressed sequences arrive, as bytea
+        key = _sql_quote_literal(sequences_key)
+        compressed = ", ".join(
+            f"decode(joint_metadata -> '{key}' -> '{_sql_quote_literal(name)}' "
+            "->> 'compressedSequence', 'base64')"
+            for name in names
+        )
+        sequences_sql = f"ARRAY[{compressed}]::bytea[] AS sequences"
 
         simple_filters, computed_filters = self._split_filters()
 
         if computed_filters:
             query = self._build_aligned_sequences_metadata_with_cte(
-                params, simple_filters, computed_filters, limit, offset
+                params, sequences_sql, simple_filters, computed_filters, limit, offset
             )
         else:
             query = self._build_aligned_sequences_metadata_simple(
-                params, simple_filters, limit, offset
+                params, sequences_sql, simple_filters, limit, offset
             )
 
+        _sql_cache_put(cache_key, query)
         return query, params
 
     def _build_aligned_sequences_metadata_simple(
         self,
         params: ParamDict,
+        sequences_sql: str,
         simple_filters: list[tuple[str, Any]],
         limit: int | None,
         offset: int,
@@ -694,9 +830,8 @@ class QueryBuilder:
             SELECT
                 accession,
                 version,
-                joint_metadata -> 'alignedNucleotideSequences' AS aligned_sequences,
-                joint_metadata -> 'alignedAminoAcidSequences' AS amino_acid_sequences
-            FROM {BASE_TABLE}"""  # noqa: E501
+                {sequences_sql}
+            FROM {BASE_TABLE}"""
         query += self._build_join_sql(joins, indent="            ")
         query += (
             "\n            " + self._common_where_prefix().replace("\n", "\n            ")
@@ -715,6 +850,7 @@ class QueryBuilder:
     def _build_aligned_sequences_metadata_with_cte(
         self,
         params: ParamDict,
+        sequences_sql: str,
         simple_filters: list[tuple[str, Any]],
         computed_filters: list[tuple[str, Any]],
         limit: int | None,
@@ -732,8 +868,7 @@ class QueryBuilder:
         joins = self._collect_join_requirements(set(cte_fields) | set(simple_filter_bases))
 
         select_parts = [self._field_definition(field).select_sql(self) for field in cte_fields]
-        select_parts.append("joint_metadata -> 'alignedNucleotideSequences' AS aligned_sequences")
-        select_parts.append("joint_metadata -> 'alignedAminoAcidSequences' AS amino_acid_sequences")
+        select_parts.append(sequences_sql)
         select_clause = ",\n        ".join(select_parts)
 
         cte_where: list[str] = []
@@ -759,7 +894,7 @@ class QueryBuilder:
             query += f"\n      AND {clause}"
         query += "\n)\n"
 
-        query += 'SELECT "accession", "version", aligned_sequences, amino_acid_sequences\nFROM computed_fields'
+        query += 'SELECT "accession", "version", sequences\nFROM computed_fields'
 
         if outer_where:
             query += "\nWHERE " + " AND ".join(outer_where)
@@ -780,14 +915,37 @@ class QueryBuilder:
         segment_name: str,
         limit: int | None,
         offset: int,
+    ) -> tuple[str, ParamDict]:
+        cache_key = self._query_shape("sequences", segment_key, segment_name, limit, offset)
+        cached = _sql_cache_get(cache_key)
+        if cached is not None:
+            return cached, self._filter_params()
+
+        query, params = self._render_sequence_query(
+            segment_key=segment_key, segment_name=segment_name, limit=limit, offset=offset
+        )
+        _sql_cache_put(cache_key, query)
+        return query, params
+
+    def _render_sequence_query(
+        self,
+        *,
+        segment_key: str,
+        segment_name: str,
+        limit: int | None,
+        offset: int,
     ) -> tuple[str, ParamDict]:
         params: ParamDict = {"organism": self.organism}
 
+        # The segment/gene name comes from the URL, so it must be quoted
         json_path = (
             "joint_metadata -> '{key}' -> '{segment}' ->> 'compressedSequence'"
-            .format(key=segment_key, segment=segment_name)
+            .format(key=segment_key, segment=_sql_quote_literal(segment_name))
         )
 
+        # Base64-decode in Postgres so rows arrive as bytea (bytes), not text
+        compressed_sql = f"decode({json_path}, 'base64')"
+
         simple_filters, computed_filters = self._split_filters()
 
         if not computed_filters:
@@ -805,7 +963,7 @@ class QueryBuilder:
                 "SELECT\n"
                 "        accession,\n"
                 "        version,\n"
-                f"        {json_path} AS compressed_seq\n"
+                f"        {compressed_sql} AS compressed_seq\n"
                 f"FROM {BASE_TABLE}"
             )
             query += self._build_join_sql(joins, indent="    ")
@@ -838,7 +996,7 @@ class QueryBuilder:
         joins = self._collect_join_requirements(all_fields)
 
         select_parts = [self._field_definition(name).select_sql(self) for name in select_field_names]
-        select_parts.append(f"{json_path} AS compressed_seq")
+        select_parts.append(f"{compressed_sql} AS compressed_seq")
         select_clause = ",\n        ".join(select_parts)
 
         cte_where: list[str] = []
@@ -885,6 +1043,95 @@ class QueryBuilder:
 
         return query, params
 
+    # ------------------------------------------------------------------
+    # Insertion queries
+    # ------------------------------------------------------------------
+    def build_insertions_query(self, column: str) -> tuple[str, ParamDict]:
+        """
+        Count insertions across all matching sequences. Rows are
+        (count, inserted_symbols, position, sequence_name).
+
+        Args:
+            column: joint_metadata key holding an object of segment/gene name to a list
+                of "position:symbols" strings ('nucleotideInsertions' or
+                'aminoAcidInsertions')
+        """
+        cache_key = self._query_shape("insertions", column)
+        cached = _sql_cache_get(cache_key)
+        if cached is not None:
+            return cached, self._filter_params()
+
+        params: ParamDict = {"organism": self.organism}
+        source = f"joint_metadata -> '{_sql_quote_literal(column)}'"
+
+        simple_filters, computed_filters = self._split_filters()
+        computed_field_names = self._ordered_unique(
+            [self._resolve_filter_base(field)[0] for field, _ in computed_filters]
+        )
+        simple_filter_fields = [self._resolve_filter_base(field)[0] for field, _ in simple_filters]
+        joins = self._collect_join_requirements(computed_field_names + simple_filter_fields)
+
+        select_parts = [self._field_definition(name).select_sql(self) for name in computed_field_names]
+        select_parts.append(f"{source} AS insertions")
+        select_clause = ",\n        ".join(select_parts)
+
+        cte_where: list[str] = []
+        for field, value in simple_filters:
+            self._append_filter_clause(cte_where, field=field, value=value, params=params, use_alias=False)
+
+        outer_where: list[str] = []
+        for field, value in computed_filters:
+            self._append_filter_clause(outer_where, field=field, value=value, params=params, use_alias=True)
+
+        # The CTE is referenced once, so Postgres inlines it; it only exists to give
+        # computed-field filters their aliases
+        query = (
+            "WITH filtered_sequences AS (\n"
+            "    SELECT\n"
+            f"        {select_clause}\n"
+            f"    FROM {BASE_TABLE}"
+        )
+        query += self._build_join_sql(joins, indent="        ")
+        query += (
+            "\n    " + self._common_where_prefix().replace("\n", "\n    ") +
+            f"\n      AND {source} IS NOT NULL"
+        )
+        for clause in cte_where:
+            query += f"\n      AND {clause}"
+        query += "\n)\n"
+
+        # One pass: expand each sequence's insertions per segment/gene, then split
+        # "position:symbols". Non-array values (e.g. null) are skipped, as the amino acid
+        # query always did, rather than failing the whole query.
+        query += (
+            "SELECT\n"
+            "    COUNT(*) AS count,\n"
+            "    inserted_symbols,\n"
+            "    position,\n"
+            "    sequence_name\n"
+            "FROM filtered_sequences\n"
+            "CROSS JOIN LATERAL jsonb_each(filtered_sequences.insertions)"
+            " AS entries(sequence_name, insertion_list)\n"
+            "CROSS JOIN LATERAL jsonb_array_elements_text(\n"
+            "    CASE WHEN jsonb_typeof(entries.insertion_list) = 'array'"
+            " THEN entries.insertion_list ELSE '[]'::jsonb END\n"
+            ") AS elements(insertion_str)\n"
+            "CROSS JOIN LATERAL (\n"
+            "    SELECT\n"
+            "        split_part(elements.insertion_str, ':', 1)::int AS position,\n"
+            "        split_part(elements.insertion_str, ':', 2) AS inserted_symbols\n"
+            ") AS parsed"
+        )
+        if outer_where:
+            query += "\nWHERE " + "\n  AND ".join(outer_where)
+        query += "\nGROUP BY sequence_name, position, inserted_symbols"
+        query += "\nORDER BY " + _INSERTIONS_ORDER_BY.get(
+            column, _INSERTIONS_ORDER_BY["aminoAcidInsertions"]
+        )
+
+        _sql_cache_put(cache_key, query)
+        return query, params
+
     # ------------------------------------------------------------------
     # Details queries
     # ------------------------------------------------------------------
@@ -894,6 +1141,38 @@ class QueryBuilder:
         limit: int | None = None,
         offset: int = 0,
     ) -> tuple[str, ParamDict]:
+        return self._details_query(selected_fields, limit, offset, json_rows=False)
+
+    def build_details_json_query(
+        self,
+        selected_fields: list[str] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[str, ParamDict]:
+        """
+        The rows of build_details_query, each rendered by Postgres as a JSON object and
+        returned as UTF-8 bytes (column row_json), ready to be spliced into a response.
+        """
+        return self._details_query(selected_fields, limit, offset, json_rows=True)
+
+    def _details_query(
+        self,
+        selected_fields: list[str] | None,
+        limit: int | None,
+        offset: int,
+        *,
+        json_rows: bool,
+    ) -> tuple[str, ParamDict]:
+        cache_key = self._query_shape(
+            "details_json" if json_rows else "details",
+            None if selected_fields is None else tuple(selected_fields),
+            limit,
+            offset,
+        )
+        cached = _sql_cache_get(cache_key)
+        if cached is not None:
+            return cached, self._filter_params()
+
         params: ParamDict = {"organism": self.organism}
 
         select_all = selected_fields is None
@@ -916,6 +1195,7 @@ class QueryBuilder:
                 select_all,
                 limit,
                 offset,
+                json_rows,
             )
         else:
             query = self._build_details_query_simple(
@@ -923,10 +1203,44 @@ class QueryBuilder:
                 fields,
                 limit,
                 offset,
+                json_rows,
             )
 
+        _sql_cache_put(cache_key, query)
         return query, params
 
+    def _json_rows_query(
+        self, query: str, fields: list[str], order_terms: list[tuple[str, str]]
+    ) -> str:
+        """
+        Wrap a details query that exposes its sort keys as "__sort_N" columns so each row
+        comes back as a JSON object. A subquery's ORDER BY is not guaranteed to survive
+        the outer SELECT, so the ordering is re-applied on the exposed keys (the planner
+        sees the subquery is already sorted by them and does not sort again).
+        """
+        columns = []
+        for field in fields:
+            column = f'details."{field}"'
+            if self._get_field_type(field) == "float":
+                # Match the Python serializer: integral floats keep ".0", NaN/inf are null
+                column = (
+                    f"CASE WHEN {column} IN ('NaN', 'Infinity', '-Infinity') THEN NULL"
+                    f" WHEN {column}::text ~ '^-?[0-9]+$' THEN ({column}::text || '.0')::json"
+                    f" ELSE to_json({column}) END"
+                )
+            columns.append(f'{column} AS "{field}"')
+
+        outer_order = ", ".join(
+            f'details."__sort_{index}" {direction}'.rstrip()
+            for index, (_, direction) in enumerate(order_terms)
+        )
+        return (
+            "SELECT convert_to(row_to_json(row_fields)::text, 'UTF8') AS row_json\n"
+            f"FROM (\n{query}\n) AS details\n"
+            f"CROSS JOIN LATERAL (SELECT {', '.join(columns)}) AS row_fields\n"
+            f"ORDER BY {outer_order}"
+        )
+
     def _build_details_query_with_cte(
         self,
         params: ParamDict,
@@ -935,6 +1249,7 @@ class QueryBuilder:
         select_all: bool,
         limit: int | None,
         offset: int,
+        json_rows: bool = False,
     ) -> str:
         cte_fields = self._ordered_unique(
             fields + filter_base_fields + self._order_dependency_fields() + ["accession"]
@@ -946,9 +1261,9 @@ class QueryBuilder:
 
         cte_where: list[str] = []
         outer_where: list[str] = []
+        _, computed_fields = _classify_filters(tuple(self.filters))
         for field, value in self.filters.items():
-            base_field, _ = self._resolve_filter_base(field)
-            if self._field_definition(base_field).requires_cte:
+            if field in computed_fields:
                 self._append_filter_clause(
                     outer_where,
                     field=field,
@@ -980,6 +1295,11 @@ class QueryBuilder:
         query += "\n)\n"
 
         outer_select = "*" if select_all else ", ".join(f'"{field}"' for field in fields)
+        order_terms = self._order_by_terms("details", use_alias=True)
+        if json_rows:
+            outer_select += "".join(
+                f', {expr} AS "__sort_{index}"' for index, (expr, _) in enumerate(order_terms)
+            )
         query += f"SELECT {outer_select}\nFROM computed_fields"
 
         if outer_where:
@@ -987,14 +1307,15 @@ class QueryBuilder:
             for clause in outer_where:
                 query += f"\n  AND {clause}"
 
-        order_clause = self.build_order_by_clause("details")
-        query += f"\nORDER BY {order_clause}"
+        query += f"\nORDER BY {self._order_clause(order_terms, sort_columns=json_rows)}"
 
         if limit is not None:
             query += f"\nLIMIT {limit}"
         if offset > 0:
             query += f"\nOFFSET {offset}"
 
+        if json_rows:
+            return self._json_rows_query(query, cte_fields if select_all else fields, order_terms)
         return query
 
     def _build_details_query_simple(
@@ -1003,8 +1324,16 @@ class QueryBuilder:
         fields: list[str],
         limit: int | None,
         offset: int,
+        json_rows: bool = False,
     ) -> str:
         select_parts = [self._field_definition(field).select_sql(self) for field in fields]
+        # Sort keys are exposed as columns on the underlying expressions, as the output
+        # aliases cannot be referenced from the select list
+        order_terms = self._order_by_terms("details", use_alias=not json_rows)
+        if json_rows:
+            select_parts.extend(
+                f'{expr} AS "__sort_{index}"' for index, (expr, _) in enumerate(order_terms)
+            )
         select_clause = ",\n        ".join(select_parts)
 
         join_fields = set(fields)
@@ -1027,14 +1356,15 @@ class QueryBuilder:
         for clause in where_clauses:
             query += f"\n  AND {clause}"
 
-        order_clause = self.build_order_by_clause("details")
-        query += f"\nORDER BY {order_clause}"
+        query += f"\nORDER BY {self._order_clause(order_terms, sort_columns=json_rows)}"
 
         if limit is not None:
             query += f"\nLIMIT {limit}"
         if offset > 0:
             query += f"\nOFFSET {offset}"
 
+        if json_rows:
+            return self._json_rows_query(query, fields, order_terms)
         return query
 
     # ------------------------------------------------------------------
@@ -5,6 +5,9 @@ These tests verify that Querulus produces identical results to LAPIS
 for various query patterns.
 """
 
+import csv
+import io
+
 import requests
 import pytest
 from typing import Any
@@ -122,6 +125,31 @@ class TestAggregatedEndpoint:
 
         assert lapis_count == querulus_count, f"USA count mismatch: LAPIS={lapis_count}, Querulus={querulus_count}"
 
+    def test_filter_by_repeated_country(self, config: TestConfig):
+        """Test a repeated geoLocCountry parameter matches any of its values"""
+        countries_resp = requests.get(
+            config.lapis_endpoint("sample/aggregated"),
+            params={"fields": "geoLocCountry", "orderBy": "count"},
+        )
+        assert countries_resp.status_code == 200
+        countries = [item["geoLocCountry"] for item in countries_resp.json()["data"] if item["geoLocCountry"]]
+        assert len(countries) >= 2, "Need two countries to filter by"
+
+        # Sent as geoLocCountry=<first>&geoLocCountry=<second>
+        params = {"fields": "geoLocCountry", "geoLocCountry": countries[-2:]}
+
+        lapis_resp = requests.get(config.lapis_endpoint("sample/aggregated"), params=params)
+        querulus_resp = requests.get(config.querulus_endpoint("sample/aggregated"), params=params)
+
+        assert lapis_resp.status_code == 200
+        assert querulus_resp.status_code == 200
+
+        lapis_data = lapis_resp.json()["data"]
+        querulus_data = querulus_resp.json()["data"]
+
+        assert {item["geoLocCountry"] for item in querulus_data} == set(countries[-2:])
+        assert compare_counts(lapis_data, querulus_data), "Repeated country filter results don't match"
+
     def test_group_and_filter(self, config: TestConfig):
         """Test grouping by lineage with country filter"""
         params = {"fields": "lineage", "geoLocCountry": "USA"}
@@ -490,6 +518,34 @@ class TestOrderBy:
         # Random ordering should give different results (very unlikely to be the same)
         assert accessions1 != accessions2, "Random ordering returned same results twice"
 
+    def test_post_lenient_fields_and_order_by(self, config: TestConfig):
+        """Test POST accepts a single fields string and ignores orderBy entries without a field"""
+        body = {
+            "fields": "geoLocCountry",
+            "limit": 10,
+            "orderBy": [{"type": "descending"}, {"field": "geoLocCountry"}],
+        }
+
+        resp = requests.post(config.querulus_endpoint("sample/aggregated"), json=body)
+        assert resp.status_code == 200, f"Querulus returned {resp.status_code}: {resp.text}"
+
+        data = resp.json()["data"]
+        assert all(set(item) == {"geoLocCountry", "count"} for item in data)
+
+        countries = [item["geoLocCountry"] for item in data]
+        assert countries == sorted(countries, key=lambda x: (x is not None, x)), "Aggregated results not sorted"
+
+    def test_post_null_fields_and_data_format(self, config: TestConfig):
+        """Test POST treats null fields and dataFormat as not given"""
+        resp = requests.post(
+            config.querulus_endpoint("sample/aggregated"), json={"fields": None, "dataFormat": None}
+        )
+        assert resp.status_code == 200, f"Querulus returned {resp.status_code}: {resp.text}"
+
+        data = resp.json()["data"]
+        assert len(data) == 1
+        assert set(data[0]) == {"count"}
+
 
 class TestRangeQueries:
     """Test range query support for numeric and date fields"""
@@ -762,6 +818,46 @@ class TestDataFormats:
         # Check data rows
         assert len(querulus_lines) == 6  # header + 5 data rows
 
+    def test_details_json_matches_tsv(self, config: TestConfig):
+        """Test that JSON details render typed fields (int, float, date, bool) like TSV"""
+        params = {"limit": "20", "orderBy": "accessionVersion"}
+
+        json_resp = requests.get(config.querulus_endpoint("sample/details"), params=params)
+        tsv_resp = requests.get(
+            config.querulus_endpoint("sample/details"), params={**params, "dataFormat": "tsv"}
+        )
+
+        assert json_resp.status_code == 200
+        assert tsv_resp.status_code == 200
+
+        json_rows = json_resp.json()["data"]
+        tsv_lines = list(csv.reader(io.StringIO(tsv_resp.text), delimiter="\t"))
+        headers, tsv_rows = tsv_lines[0], tsv_lines[1:]
+
+        assert len(json_rows) == len(tsv_rows) == 20
+        for json_row, tsv_row in zip(json_rows, tsv_rows):
+            assert list(json_row) == headers
+            # Same rows in the same order, each value rendering as its TSV cell
+            assert ["" if value is None else str(value) for value in json_row.values()] == tsv_row
+
+    def test_details_json_data_use_terms_default_order(self, config: TestConfig):
+        """Test JSON details with a data use terms field (joined table) and the default order"""
+        params = {"fields": "accessionVersion,dataUseTerms"}
+
+        lapis_resp = requests.get(config.lapis_endpoint("sample/details"), params=params)
+        querulus_resp = requests.get(config.querulus_endpoint("sample/details"), params=params)
+
+        assert lapis_resp.status_code == 200
+        assert querulus_resp.status_code == 200
+
+        lapis_data = lapis_resp.json()["data"]
+        querulus_data = querulus_resp.json()["data"]
+
+        assert len(querulus_data) > 0
+        assert sorted(querulus_data, key=lambda row: row["accessionVersion"]) == sorted(
+            lapis_data, key=lambda row: row["accessionVersion"]
+        )
+
     def test_aggregated_json_format_default(self, config: TestConfig):
         """Test that JSON is the default format for aggregated"""
         params = {"fields": "geoLocCountry", "limit": "3"}
@@ -1199,6 +1295,30 @@ def test_amino_acid_mutations_single_sample_post():
             f"sequenceName mismatch for {lapis_mut['mutation']}"
 
 
+def test_nucleotide_mutations_min_proportion():
+    """Test minProportion filters mutations (GET and POST) and is not taken as a metadata filter"""
+    config = TestConfig(organism="ebola-sudan")
+    params = {"minProportion": "0.5"}
+
+    lapis_resp = requests.get(config.lapis_endpoint("sample/nucleotideMutations"), params=params)
+    querulus_resp = requests.get(config.querulus_endpoint("sample/nucleotideMutations"), params=params)
+    querulus_post_resp = requests.post(
+        config.querulus_endpoint("sample/nucleotideMutations"), json={"minProportion": 0.5}
+    )
+
+    assert lapis_resp.status_code == 200
+    assert querulus_resp.status_code == 200
+    assert querulus_post_resp.status_code == 200
+
+    lapis_mutations = lapis_resp.json()["data"]
+    querulus_mutations = querulus_resp.json()["data"]
+
+    assert len(querulus_mutations) > 0, "Querulus returned no mutations"
+    assert all(m["proportion"] >= 0.5 for m in querulus_mutations)
+    assert {m["mutation"] for m in querulus_mutations} == {m["mutation"] for m in lapis_mutations}
+    assert querulus_post_resp.json()["data"] == querulus_mutations
+
+
 class TestPostSequenceEndpoints:
     """Test POST endpoints for sequence retrieval with specific accessionVersion"""
 
@@ -1341,6 +1461,32 @@ class TestPostSequenceEndpoints:
 
         assert lapis_set == querulus_set, "Insertion data doesn't match"
 
+    def test_post_insertions_order_and_labels(self):
+        """Test that insertions are ordered by count, then position (amino acids: gene first)"""
+        config = TestConfig(
+            organism="cchf"
+        )
+
+        nucleotide_resp = requests.post(config.querulus_endpoint("sample/nucleotideInsertions"), json={})
+        amino_acid_resp = requests.post(config.querulus_endpoint("sample/aminoAcidInsertions"), json={})
+
+        assert nucleotide_resp.status_code == 200, f"Querulus returned {nucleotide_resp.status_code}: {nucleotide_resp.text}"
+        assert amino_acid_resp.status_code == 200, f"Querulus returned {amino_acid_resp.status_code}: {amino_acid_resp.text}"
+
+        nucleotide_insertions = nucleotide_resp.json()["data"]
+        amino_acid_insertions = amino_acid_resp.json()["data"]
+
+        nucleotide_keys = [(-ins["count"], ins["position"]) for ins in nucleotide_insertions]
+        assert nucleotide_keys == sorted(nucleotide_keys), "Nucleotide insertions should be ordered by count DESC, position ASC"
+
+        amino_acid_keys = [(-ins["count"], ins["sequenceName"], ins["position"]) for ins in amino_acid_insertions]
+        assert amino_acid_keys == sorted(amino_acid_keys), \
+            "Amino acid insertions should be ordered by count DESC, gene ASC, position ASC"
+
+        for ins in nucleotide_insertions + amino_acid_insertions:
+            assert ins["insertion"] == f"ins_{ins['sequenceName']}:{ins['position']}:{ins['insertedSymbols']}", \
+                f"Unexpected insertion label {ins['insertion']}"
+
     # TODO: Re-enable this test - currently disabled due to missing fastaHeaderTemplate implementation
     # Need to implement {displayName} and other template variables in FASTA headers
     # def test_get_unaligned_nucleotide_sequences_segment_with_filters(self):